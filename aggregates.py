@@ -0,0 +1,66 @@
+# aggregates.py - expense totals with per-category and per-month rollups
+import hashlib
+from collections import defaultdict
+
+# Columns the PDF report and analytics show; a change to any of them changes the ledger version
+VERSION_FIELDS = ("id", "title", "amount", "category", "date")
+
+
+def _month(date):
+    return str(date or "")[:7] or "unknown"
+
+
+def row_digest(row):
+    """Order-independent contribution of one row to the ledger version."""
+    raw = "|".join(str(row.get(f) if row.get(f) is not None else "") for f in VERSION_FIELDS)
+    return int(hashlib.md5(raw.encode()).hexdigest(), 16)
+
+
+class ExpenseSummary:
+    """
+    Total, row count and category / month rollups for one user's ledger,
+    plus a version string that changes whenever any row is added, edited or
+    removed (the key for caches built from the same rows).
+    """
+
+    def __init__(self, total=0.0, count=0, by_category=None, by_month=None, version=""):
+        self.total = float(total or 0)
+        self.count = int(count or 0)
+        self.by_category = defaultdict(float, by_category or {})
+        self.by_month = defaultdict(float, by_month or {})
+        self.version = version or ""
+
+    @classmethod
+    def from_rows(cls, rows):
+        summary, digest = cls(), 0
+        for row in rows:
+            summary._add(row)
+            digest = (digest + row_digest(row)) % (1 << 128)
+        summary.version = f"{summary.count}-{digest:032x}"
+        return summary
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data.get("total"),
+            data.get("count"),
+            {k: float(v) for k, v in (data.get("by_category") or {}).items()},
+            {k: float(v) for k, v in (data.get("by_month") or {}).items()},
+            data.get("version"),
+        )
+
+    def _add(self, row):
+        amount = float(row.get("amount") or 0)
+        self.total += amount
+        self.count += 1
+        self.by_category[row.get("category") or "Other"] += amount
+        self.by_month[_month(row.get("date"))] += amount
+
+    def snapshot(self):
+        return {
+            "total": round(self.total, 2),
+            "count": self.count,
+            "by_category": {k: round(v, 2) for k, v in sorted(self.by_category.items(), key=lambda kv: -kv[1])},
+            "by_month": {k: round(v, 2) for k, v in sorted(self.by_month.items())},
+            "version": self.version,
+        }
@@ -0,0 +1,118 @@
+# analytics.py - vectorized expense analytics (monthly trend, categories, outliers)
+#
+# Rows are collected into columns once and every statistic is computed with
+# NumPy array operations (bincount / cumsum / argsort) instead of per-row
+# Python loops. NumPy is imported on first use to keep it off cold starts.
+
+
+class ExpenseColumns:
+    """Columnar buffer filled from a chunked fetch of expense rows."""
+
+    def __init__(self):
+        self.ids = []
+        self.titles = []
+        self.amounts = []
+        self.categories = []
+        self.dates = []
+
+    def extend(self, rows):
+        for row in rows:
+            self.ids.append(row.get("id"))
+            self.titles.append(row.get("title") or "")
+            self.amounts.append(float(row.get("amount") or 0))
+            self.categories.append(row.get("category") or "Other")
+            self.dates.append(str(row.get("date") or "")[:10])
+        return self
+
+    def __len__(self):
+        return len(self.amounts)
+
+
+def _money(values):
+    return [round(v, 2) for v in values.tolist()]
+
+
+def _monthly(np, amounts, dates, window):
+    """Gap-free month totals from the first to the last dated expense, with a trailing moving average."""
+    if not len(dates):
+        return [], 0, window
+    months = dates.astype("datetime64[M]")
+    first, last = months.min(), months.max()
+    month_idx = (months - first).astype(np.int64)
+    n_months = int(month_idx.max()) + 1
+    totals = np.bincount(month_idx, weights=amounts, minlength=n_months)
+    counts = np.bincount(month_idx, minlength=n_months)
+    sums = np.concatenate(([0.0], np.cumsum(totals)))
+    window = max(1, min(window, n_months))
+    moving = np.full(n_months, np.nan)
+    moving[window - 1:] = (sums[window:] - sums[:-window]) / window
+    labels = np.arange(first, last + 1).astype(str)
+
+    monthly = [
+        {"month": m, "total": t, "count": c, "moving_avg": None if np.isnan(a) else round(a, 2)}
+        for m, t, c, a in zip(labels.tolist(), _money(totals), counts.tolist(), moving.tolist())
+    ]
+    return monthly, round(float(totals.mean()), 2), window
+
+
+def analyze(columns, window=3, top=10):
+    """
+    Analytics for one ledger: summary figures, a gap-free monthly trend with a
+    trailing moving average over `window` months, the category breakdown, and
+    the `top` expenses furthest above their category's mean (z-score).
+    """
+    import numpy as np
+
+    if not len(columns):
+        return {"summary": {"total": 0, "count": 0}, "monthly": [], "categories": [], "outliers": [],
+                "window": window}
+
+    amounts = np.asarray(columns.amounts, dtype=np.float64)
+    dates = np.asarray(columns.dates, dtype="datetime64[D]")  # "" -> NaT
+    dated = ~np.isnat(dates)
+    monthly, monthly_mean, window = _monthly(np, amounts[dated], dates[dated], window)
+
+    # Category breakdown
+    names, cat_idx = np.unique(np.asarray(columns.categories, dtype=str), return_inverse=True)
+    cat_totals = np.bincount(cat_idx, weights=amounts)
+    cat_counts = np.bincount(cat_idx)
+    total = amounts.sum()
+    order = np.argsort(-cat_totals, kind="stable")
+    share = cat_totals / total if total else np.zeros_like(cat_totals)
+    categories = [
+        {"category": str(names[i]), "total": round(float(cat_totals[i]), 2), "count": int(cat_counts[i]),
+         "share": round(float(share[i]), 4)}
+        for i in order.tolist()
+    ]
+
+    # Outliers: distance from the category mean in category standard deviations
+    cat_mean = cat_totals / cat_counts
+    cat_var = np.bincount(cat_idx, weights=amounts * amounts) / cat_counts - cat_mean ** 2
+    cat_std = np.sqrt(np.clip(cat_var, 0, None))
+    std = cat_std[cat_idx]
+    z = np.divide(amounts - cat_mean[cat_idx], std, out=np.zeros_like(amounts), where=std > 0)
+    k = min(top, len(z))
+    picks = np.argpartition(-z, k - 1)[:k]
+    picks = picks[np.argsort(-z[picks], kind="stable")]
+    outliers = [
+        {"id": columns.ids[i], "title": columns.titles[i], "amount": columns.amounts[i],
+         "category": columns.categories[i], "date": columns.dates[i],
+         "category_mean": round(float(cat_mean[cat_idx[i]]), 2), "z_score": round(float(z[i]), 2)}
+        for i in picks.tolist() if z[i] > 0
+    ]
+
+    return {
+        "summary": {
+            "total": round(float(total), 2),
+            "count": int(len(amounts)),
+            "mean": round(float(amounts.mean()), 2),
+            "median": round(float(np.median(amounts)), 2),
+            "monthly_mean": monthly_mean,
+            "first_month": monthly[0]["month"] if monthly else None,
+            "last_month": monthly[-1]["month"] if monthly else None,
+        },
+        "monthly": monthly,
+        "categories": categories,
+        "outliers": outliers,
+        "window": window,
+    }
@@ -9,30 +9,64 @@ from flask import (
     flash,
     jsonify,
     send_file,
+    Response,
+    g,
+    make_response,
 )
-from flask_mail import Mail, Message
 from functools import wraps
-import cloudinary
-import cloudinary.uploader
+import atexit
+import base64
+import contextvars
 import hashlib
+import hmac
+import json
 import os
-from database import supabase  # <- your configured supabase client
+import threading
+import time
+from database import backend  # Supabase or SQLite, per DATA_BACKEND
+import assets
+import images
+from aggregates import ExpenseSummary
+from cache import TTLCache
+from feeds import ChangeFeed
+from fragments import FragmentCacheExtension
+import metrics
+from outbox import Outbox
+from ingest import RecentKeys, TokenBucket, WriteBehindBuffer
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime, timezone
 from dotenv import load_dotenv
-from io import StringIO,BytesIO
-import csv
-from reportlab.pdfgen import canvas
+from io import BytesIO
 
 app = Flask(__name__)
 load_dotenv()
 app.secret_key = os.getenv("FLASK_SECRET_KEY")
 
-# Cloudinary (kept as before)
-cloudinary.config(
-    cloud_name=os.getenv("CLOUD_NAME"),
-    api_key=os.getenv("CLOUD_API"),
-    api_secret=os.getenv("CLOUD_KEY")
-)
+# Hashed/precompressed static files from `python assets.py`, when built
+assets.init_app(app)
+# cloudinary_url / responsive_img template filters
+images.init_app(app)
+
+# Heavy clients (Cloudinary, Flask-Mail, reportlab, Supabase) are imported on
+# first use rather than at module load, so a cold serverless start that only
+# renders public pages never pays for them.
+_cloudinary_ready = False
+
+
+def cloudinary_uploader():
+    global _cloudinary_ready
+    import cloudinary
+    import cloudinary.uploader
+
+    if not _cloudinary_ready:
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUD_NAME"),
+            api_key=os.getenv("CLOUD_API"),
+            api_secret=os.getenv("CLOUD_KEY")
+        )
+        _cloudinary_ready = True
+    return cloudinary.uploader
 
 # Mail (kept; ensure environment variables or set here)
 app.config["MAIL_SERVER"] = "smtp.gmail.com"
@@ -41,25 +75,82 @@ app.config["MAIL_USE_TLS"] = True
 app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
 app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
 
-mail = Mail(app)
+_mail = None
+
+
+def get_mail():
+    global _mail
+    if _mail is None:
+        from flask_mail import Mail
+
+        _mail = Mail(app)
+    return _mail
+
+
+def _reply_delivered(job):
+    supa_update("contact", {"replied": True}, filters=[("eq", "id", job.meta["contact_id"])])
+    invalidate_stats()
+
+
+def _reply_failed(job):
+    print(f"Reply to contact {job.meta['contact_id']} was not delivered: {job.last_error}")
+
+
+# Replies are handed to this outbox and sent by its worker thread over one
+# reused SMTP connection; contact.replied is set once delivery succeeds.
+# MAIL_OUTBOX=0 sends inside the request instead. That is the default on
+# Vercel (which sets VERCEL=1), since serverless hosts freeze background
+# threads between invocations and queued replies might never go out.
+MAIL_OUTBOX = os.getenv("MAIL_OUTBOX", "0" if os.getenv("VERCEL") else "1") == "1"
+mail_outbox = Outbox(
+    connect=lambda: get_mail().connect(),
+    on_sent=_reply_delivered,
+    on_failed=_reply_failed,
+    context=app.app_context,
+    max_attempts=int(os.getenv("MAIL_MAX_ATTEMPTS", 5)),
+    backoff=float(os.getenv("MAIL_RETRY_BACKOFF", 2)),
+    idle_timeout=float(os.getenv("MAIL_IDLE_TIMEOUT", 30)),
+)
+
 
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+UPLOAD_FOLDERS = {"home", "projects", "students"}
+
+# Uploads from one form run side by side; replaced images are deleted on a
+# single background worker so the request never waits for Cloudinary destroy.
+upload_pool = ThreadPoolExecutor(max_workers=int(os.getenv("UPLOAD_WORKERS", 4)))
+cleanup_pool = ThreadPoolExecutor(max_workers=1)
+
+# When enabled, the admin forms upload straight from the browser to Cloudinary
+# with a signature from /uploads/sign and post back only the public id.
+DIRECT_UPLOADS = os.getenv("CLOUDINARY_DIRECT_UPLOADS", "0") == "1"
 
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _destroy_image(public_id):
+    try:
+        with metrics.timed("cloudinary", "destroy"):
+            cloudinary_uploader().destroy(public_id)
+    except Exception as e:
+        print(f"Cloudinary destroy failed for {public_id}: {e}")
+
+
+def queue_image_delete(public_id):
+    if public_id:
+        cleanup_pool.submit(_destroy_image, public_id)
+
+
 def save_image(file_from_form, current_public_id, folder_name):
     if file_from_form and allowed_file(file_from_form.filename):
         try:
-            upload_result = cloudinary.uploader.upload(file_from_form, folder=folder_name)
+            uploader = cloudinary_uploader()
+            with metrics.timed("cloudinary", "upload", folder_name):
+                upload_result = uploader.upload(file_from_form, folder=folder_name)
             new_public_id = upload_result["public_id"]
-            if current_public_id:
-                try:
-                    cloudinary.uploader.destroy(current_public_id)
-                except Exception:
-                    pass
+            queue_image_delete(current_public_id)
             return new_public_id
         except Exception as e:
             print(f"Cloudinary upload failed: {e}")
@@ -67,80 +158,415 @@ def save_image(file_from_form, current_public_id, folder_name):
     return current_public_id
 
 
+def direct_upload_id(field, folder_name):
+    """
+    Public id of an image the browser already uploaded for `field`, or None.
+    Cloudinary's response signature is checked so a forged id is ignored.
+    """
+    public_id = request.form.get(f"{field}_public_id")
+    if not public_id:
+        return None
+    import cloudinary.utils
+
+    cloudinary_uploader()  # make sure the API secret is configured
+    version = request.form.get(f"{field}_version", "")
+    signature = request.form.get(f"{field}_signature", "")
+    if not public_id.startswith(f"{folder_name}/") or not cloudinary.utils.verify_api_response_signature(
+        public_id, version, signature
+    ):
+        print(f"Rejected direct upload for {field}: bad signature or folder")
+        return None
+    return public_id
+
+
+def save_form_images(*fields):
+    """
+    Resolve several image fields of the current form at once.
+    Each field is (form_field_name, current_public_id, folder_name); direct
+    browser uploads are taken as-is and file uploads run in parallel.
+    Returns the resulting public ids in order.
+    """
+    results = [None] * len(fields)
+    futures = {}
+    for i, (field, current_public_id, folder_name) in enumerate(fields):
+        direct_id = direct_upload_id(field, folder_name)
+        if direct_id:
+            if direct_id != current_public_id:
+                queue_image_delete(current_public_id)
+            results[i] = direct_id
+        else:
+            futures[i] = upload_pool.submit(
+                contextvars.copy_context().run,
+                save_image, request.files.get(field), current_public_id, folder_name,
+            )
+    for i, future in futures.items():
+        results[i] = future.result()
+    return results
+
+
 # -------------------------
-# Helper wrappers for supabase queries
+# Helper wrappers for data queries
 # -------------------------
-def supa_select(table, select="*", filters=None, order=None, limit=None, count=False):
+# Every query goes through these helpers to `backend` (backends.py), which is
+# Supabase/PostgREST or the embedded SQLite store depending on DATA_BACKEND.
+def supa_select(table, select="*", filters=None, order=None, limit=None, count=False, offset=None, after=None):
     """
     Generic select helper.
-    filters: list of tuples: (op, column, value) where op in ['eq','neq','gt','lt','is','like'].
-    order: tuple (column, asc_bool)
+    filters: list of tuples: (op, column, value) where op in ['eq','neq','gt','lt','is','like','ilike','in'],
+             or ('search', [columns], term) for a case-insensitive substring match on any of the columns.
+    order: tuple (column, asc_bool), or a list of them applied in sequence
     limit: int
     count: bool -> request exact count
+    offset: int -> skip this many rows first (range pagination)
+    after: list of the order column values of the last row already shown
+           (keyset pagination; continues strictly after that row)
     """
-    q = supabase.table(table).select(select, count="exact" if count else None)
-    
-    if filters:
-        for op, col, val in filters:
-            if op == "eq":
-                q = q.eq(col, val)
-            elif op == "neq":
-                q = q.neq(col, val)
-            elif op == "gt":
-                q = q.gt(col, val)
-            elif op == "lt":
-                q = q.lt(col, val)
-            elif op == "is":
-                q = q.is_(col, val)
-            elif op == "like":
-                q = q.like(col, val)
-    if order:
-        col, asc = order
-        # CORRECTED LINE: Use 'desc' keyword for older library versions (e.g., v1.x)
-        # It's the opposite of ascending, so we use 'not asc'
-        q = q.order(col, desc=not asc)
-    if limit:
-        q = q.limit(limit)
-    
-    res = q.execute()
+    orders = [order] if isinstance(order, tuple) else (order or [])
+    with metrics.timed("db", "select", table):
+        res = backend.select(
+            table, select=select, filters=filters, orders=orders, limit=limit, count=count, offset=offset, after=after
+        )
+    metrics.record_rows(table, "select", res.data)
 
     if hasattr(res, 'error') and res.error:
         print(f"Supabase select error on {table}: {res.error.message}")
     return res
 
 
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 50))
+
+
+def encode_cursor(row, order):
+    values = [row.get(col) for col, _ in order]
+    return base64.urlsafe_b64encode(json.dumps(values, default=str).encode()).decode()
+
+
+def decode_cursor(token, order):
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        return None
+    return values if isinstance(values, list) and len(values) == len(order) else None
+
+
+def paginate(table, order, select="*", filters=None, page_size=PAGE_SIZE):
+    """
+    Keyset-paginated select driven by the ?after=<cursor> query argument.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    after = decode_cursor(request.args.get("after"), order)
+    res = supa_select(table, select=select, filters=filters, order=order, limit=page_size + 1, after=after)
+    rows = res.data or []
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1], order)
+    return rows, next_cursor
+
+
+def iter_rows(table, order, select="*", filters=None, chunk_size=500):
+    """
+    Yield every matching row, fetching chunk_size rows per round trip with
+    keyset pagination so memory stays flat however large the table is.
+    """
+    after = None
+    while True:
+        res = supa_select(table, select=select, filters=filters, order=order, limit=chunk_size, after=after)
+        rows = res.data or []
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        after = [rows[-1].get(col) for col, _ in order]
+
+
+# Independent selects from one route share this pool so they overlap
+# instead of paying one PostgREST round trip after another.
+query_pool = ThreadPoolExecutor(max_workers=int(os.getenv("SUPABASE_QUERY_WORKERS", 8)))
+
+
+def supa_select_many(*queries):
+    """
+    Run several independent selects concurrently.
+    Each query is a dict of supa_select keyword arguments, e.g.
+    dict(table="contact", select="id", filters=[("eq", "seen", False)], count=True).
+    Results come back in the same order; the first failure is re-raised.
+    """
+    # Each query runs in a copy of the caller's context so its timing is
+    # still attributed to the current request.
+    futures = [
+        query_pool.submit(contextvars.copy_context().run, supa_select, **q)
+        for q in queries
+    ]
+    return [f.result() for f in futures]
+
+
+def supa_rpc(fn, params=None):
+    with metrics.timed("db", "rpc", fn):
+        res = backend.rpc(fn, params or {})
+    if hasattr(res, 'error') and res.error:
+        print(f"Supabase rpc error on {fn}: {res.error.message}")
+    return res
+
+
 def supa_insert(table, payload):
-    res = supabase.table(table).insert(payload).execute()
+    with metrics.timed("db", "insert", table):
+        res = backend.insert(table, payload)
+    metrics.record_rows(table, "insert", res.data)
     if hasattr(res, 'error') and res.error:
         print(f"Supabase insert error on {table}: {res.error.message}")
     return res
 
 
 def supa_update(table, payload, filters):
-    q = supabase.table(table).update(payload)
-    for op, col, val in filters:
-        if op == "eq":
-            q = q.eq(col, val)
-    res = q.execute()
+    with metrics.timed("db", "update", table):
+        res = backend.update(table, payload, filters)
+    metrics.record_rows(table, "update", res.data)
     if hasattr(res, 'error') and res.error:
         print(f"Supabase update error on {table}: {res.error.message}")
     return res
 
 
 def supa_delete(table, filters):
-    q = supabase.table(table).delete()
-    for op, col, val in filters:
-        if op == "eq":
-            q = q.eq(col, val)
-    res = q.execute()
+    with metrics.timed("db", "delete", table):
+        res = backend.delete(table, filters)
+    metrics.record_rows(table, "delete", res.data)
     if hasattr(res, 'error') and res.error:
         print(f"Supabase delete error on {table}: {res.error.message}")
     return res
 
 
 # -------------------------
-# Auth decorator (uses session["logged_in"] truthiness)
+# Home page snapshot cache
+# -------------------------
+# The public page only changes when an admin edits it, so the assembled
+# snapshot is kept in memory and dropped by the write routes below.
+home_cache = TTLCache(ttl=int(os.getenv("HOME_CACHE_TTL", 300)))
+
+# Rendered main.html sections ({% cache %} blocks), keyed by a hash of the
+# data they show so a reloaded snapshot with new content never hits old HTML.
+app.jinja_env.add_extension(FragmentCacheExtension)
+fragment_cache = TTLCache(ttl=int(os.getenv("FRAGMENT_CACHE_TTL", 3600)))
+app.jinja_env.fragment_cache = fragment_cache
+
+
+def load_home_snapshot():
+    """Fetch the home row, active projects and categories with their skills."""
+    r, r_projects, r_categories, r_skills = supa_select_many(
+        dict(table="home", select="*", limit=1),
+        dict(table="projects", select="*", filters=[("eq", "status", 1)], order=("id", False)),
+        dict(table="categories", select="*"),
+        dict(table="skills", select="*"),
+    )
+    home_rows = r.data or []
+    home_data = home_rows[0] if home_rows else None
+    all_projects = r_projects.data or []
+    categories = r_categories.data or []
+    skills = r_skills.data or []
+
+    skills_by_category = defaultdict(list)
+    for skill in skills:
+        skills_by_category[skill["category_id"]].append(skill)
+
+    for cat in categories:
+        cat["skills"] = skills_by_category.get(cat["id"], [])
+
+    return {
+        "data": home_data,
+        "count": len(all_projects),
+        "all_projects": all_projects,
+        "categories": categories,
+        "fragment_versions": {
+            "projects": content_etag(all_projects),
+            "skills": content_etag(categories),
+        },
+    }
+
+
+def get_home_snapshot():
+    """Return (snapshot, etag, last_modified) for the public page."""
+    def load():
+        snapshot = load_home_snapshot()
+        etag = content_etag({"build": build_version(), "data": snapshot})
+        return snapshot, etag, datetime.now(timezone.utc)
+
+    return home_cache.get_or_set("home", load)
+
+
+def invalidate_home():
+    home_cache.invalidate("home")
+    fragment_cache.invalidate()
+
+
+# -------------------------
+# Dashboard counters
 # -------------------------
+# Unseen/unreplied/total contacts and active projects, read through the
+# dashboard_stats() RPC (sql/dashboard_stats.sql) in a single call and
+# cached until a route that changes one of them calls invalidate_stats().
+stats_cache = TTLCache(ttl=int(os.getenv("STATS_CACHE_TTL", 60)))
+
+
+def load_stats():
+    try:
+        r = supa_rpc("dashboard_stats")
+        if r.data:
+            return {k: int(r.data.get(k) or 0) for k in ("not_seen", "not_replied", "contacts", "projects")}
+    except Exception as e:
+        print(f"dashboard_stats rpc unavailable, falling back to counts: {e}")
+
+    r1, r2, r3, r4 = supa_select_many(
+        dict(table="contact", select="id", filters=[("eq", "seen", False)], count=True),
+        dict(table="contact", select="id", filters=[("eq", "replied", False)], count=True),
+        dict(table="contact", select="id", count=True),
+        dict(table="projects", select="id", filters=[("eq", "status", 1)], count=True),
+    )
+    return {
+        "not_seen": r1.count or 0,
+        "not_replied": r2.count or 0,
+        "contacts": r3.count or 0,
+        "projects": r4.count or 0,
+    }
+
+
+def get_stats():
+    return stats_cache.get_or_set("stats", load_stats)
+
+
+def invalidate_stats():
+    stats_cache.invalidate("stats")
+
+
+# -------------------------
+# Request instrumentation
+# -------------------------
+@app.before_request
+def start_request_timing():
+    g.metrics_token = metrics.begin_request()
+
+
+@app.after_request
+def add_server_timing(response):
+    timings = metrics.current()
+    if timings is not None:
+        response.headers["Server-Timing"] = timings.server_timing()
+        route = request.endpoint or "unmatched"
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - timings.start,
+            route=route, method=request.method, status=response.status_code,
+        )
+        metrics.REQUEST_QUERIES.observe(timings.calls("db"), route=route)
+    return response
+
+
+@app.teardown_request
+def end_request_timing(exc=None):
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        metrics.end_request(token)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    expected = os.getenv("METRICS_TOKEN")
+    if expected and request.headers.get("Authorization") != f"Bearer {expected}":
+        return "Unauthorized", 401
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
+# -------------------------
+# Conditional GET (ETag / Last-Modified)
+# -------------------------
+def content_etag(obj):
+    """Stable hash of JSON-able content, used as a strong ETag."""
+    raw = json.dumps(obj, sort_keys=True, default=str).encode()
+    return hashlib.md5(raw).hexdigest()
+
+
+_build_version = None
+
+
+def build_version():
+    """
+    Hash of the templates, the asset manifest and DEPLOY_ID (or Vercel's
+    commit SHA), so a deploy that changes the HTML or renames hashed assets
+    also changes the ETags of pages whose data didn't change.
+    """
+    global _build_version
+    if _build_version is None:
+        digest = hashlib.md5(app.config.get("ASSET_VERSION", "").encode())
+        digest.update(os.getenv("DEPLOY_ID", os.getenv("VERCEL_GIT_COMMIT_SHA", "")).encode())
+        for root, _, files in sorted(os.walk(os.path.join(app.root_path, app.template_folder))):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, app.root_path).encode())
+                with open(path, "rb") as fh:
+                    digest.update(fh.read())
+        _build_version = digest.hexdigest()
+    return _build_version
+
+
+def client_is_fresh(etag, last_modified=None):
+    """True when the client's cached copy (If-None-Match / If-Modified-Since) is still current."""
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag, last_modified, build, private=False):
+    """
+    Answer 304 Not Modified without calling build() when the client is fresh,
+    otherwise build the full response. Both carry ETag/Last-Modified and ask
+    the client to revalidate before reusing its copy.
+    """
+    if client_is_fresh(etag, last_modified):
+        response = Response(status=304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    return response
+
+
+def parse_ids(values):
+    """Integer ids from a form or JSON list; anything that isn't one is dropped."""
+    ids = []
+    for value in values or []:
+        try:
+            ids.append(int(value))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+# -------------------------
+# Authenticated principal
+# -------------------------
+# session["logged_in"] holds the signed-in admin's id, so authenticated pages
+# make no extra round trip; only routes that need the current admin row
+# (settings) call current_admin().
+def hash_password(password):
+    return hashlib.md5(password.encode()).hexdigest()
+
+
+def current_admin():
+    """The signed-in admin's row (minus the password hash), or None if the account no longer exists."""
+    admin_id = session.get("logged_in")
+    if admin_id is None:
+        return None
+    r = supa_select("admin", select="*", filters=[("eq", "id", admin_id)], limit=1)
+    if not r.data:
+        return None
+    return {k: v for k, v in r.data[0].items() if k != "password"}
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -158,42 +584,13 @@ def login_required(f):
 @app.route("/")
 def home():
     try:
-        r = supa_select("home", select="*", limit=1)
-        home_rows = r.data or []
-        home_data = home_rows[0] if home_rows else None
-
-        print(r)
-
-        r3 = supa_select("projects", select="id", filters=[("eq", "status", 1)], count=True)
-        p_count = r3.count or 0
-
-        r4 = supa_select("projects", select="*", filters=[("eq", "status", 1)], order=("id", False))
-        all_projects = r4.data or []
-
-        r_categories = supa_select("categories", select="*")
-        categories = r_categories.data or []
-
-        r_skills = supa_select("skills", select="*")
-        skills = r_skills.data or []
-
-        skills_by_category = defaultdict(list)
-        for skill in skills:
-            skills_by_category[skill["category_id"]].append(skill)
-        
-        for cat in categories:
-            cat["skills"] = skills_by_category.get(cat["id"], [])
-        
-
+        snapshot, etag, last_modified = get_home_snapshot()
     except Exception as e:
         print(f"Error in home route: {e}")
-        home_data = None
-        categories = []
-        all_projects = []
-        p_count = 0
+        snapshot = {"data": None, "count": 0, "all_projects": [], "categories": [], "fragment_versions": {}}
+        return render_template("main.html", **snapshot)
 
-    return render_template(
-        "main.html", data=home_data, count=p_count, all_projects=all_projects, categories=categories        
-    )
+    return conditional_response(etag, last_modified, lambda: render_template("main.html", **snapshot))
 
 
 @app.route("/admin", methods=["GET", "POST"])
@@ -205,14 +602,12 @@ def admin():
         entered_username = request.form["username"]
         entered_password = request.form["password"]
 
-        # hash password if stored hashed
-        hashed_password = hashlib.md5(entered_password.encode()).hexdigest()
-
-        res = supabase.table("admin").select("*").execute()
+        # Indexed lookup by username (sql/admin.sql); any number of admins
+        res = supa_select("admin", select="*", filters=[("eq", "username", entered_username)], limit=1)
         admin_row = res.data[0] if res.data else None
-        print("Admin row:", admin_row)  # debug
 
-        if admin_row and admin_row.get("password") == hashed_password and admin_row.get("username")==entered_username:
+        if admin_row and hmac.compare_digest(str(admin_row.get("password") or ""), hash_password(entered_password)):
+            session.clear()
             session["logged_in"] = admin_row.get("id")
             flash("Logged in successfully!", "success")
             return redirect(url_for("dashboard"))
@@ -227,26 +622,14 @@ def admin():
 @login_required
 def dashboard():
     try:
-        r1 = supa_select("contact", select="id", filters=[("eq", "seen", False)], count=True)
-        not_seen = r1.count or 0
-
-        r2 = supa_select("contact", select="id", filters=[("eq", "replied", False)], count=True)
-        not_replied = r2.count or 0
-
-        r3 = supa_select("projects", select="id", filters=[("eq", "status", 1)], count=True)
-        projects = r3.count or 0
+        stats = get_stats()
+        not_seen = stats["not_seen"]
+        not_replied = stats["not_replied"]
+        projects = stats["projects"]
 
         r4 = supa_select("home", select="*", limit=1)
         admin = r4.data[0] if r4.data else None
-
-        res = supa_select(
-            "expense",
-            select="*",
-            filters=[("eq", "user_id", session["logged_in"])],
-            order=("date", False)
-        )
-        expenses = res.data or []
-        total = sum(e["amount"] for e in expenses)
+        total = get_expense_summary(session["logged_in"])["total"]
 
     except Exception as e:
         print(f"Error fetching dashboard data: {e}")
@@ -267,21 +650,17 @@ def dashboard():
 @login_required
 def contacts():
     try:
-        r_not_seen = supa_select("contact", select="id", filters=[("eq", "seen", False)], count=True)
-        not_seen = r_not_seen.count or 0
-
-        r_not_replied = supa_select("contact", select="id", filters=[("eq", "replied", False)], count=True)
-        not_replied = r_not_replied.count or 0
-
-        r_count = supa_select("contact", select="id", count=True)
-        count = r_count.count or 0
+        stats = get_stats()
+        not_seen = stats["not_seen"]
+        not_replied = stats["not_replied"]
+        count = stats["contacts"]
 
-        r_msgs = supa_select("contact", select="*", order=("replied", True))
-        messages_as_dicts = r_msgs.data or []
+        messages_as_dicts, next_cursor = paginate("contact", order=[("replied", True), ("id", False)])
         
     except Exception as e:
         print(f"Error fetching messages: {e}")
         messages_as_dicts = []
+        next_cursor = None
         not_seen = not_replied = count = 0
 
     return render_template(
@@ -290,6 +669,7 @@ def contacts():
         not_replied=not_replied,
         count=count,
         messages=messages_as_dicts,
+        next_cursor=next_cursor,
     )
 
 
@@ -306,13 +686,23 @@ def reply(id):
         subject = request.form["subject"]
         body = request.form["body"]
         try:
+            from flask_mail import Message
+
+            get_mail()  # Message() reads the default sender from the registered extension
             reply_msg = Message(
                 subject=subject, sender=app.config["MAIL_USERNAME"], recipients=[msg.get("email")]
             )
             reply_msg.body = body
-            mail.send(reply_msg)
+            if MAIL_OUTBOX:
+                mail_outbox.put(reply_msg, contact_id=id)
+                flash("Reply queued for delivery.", "success")
+                return redirect(url_for("contacts"))
+
+            with metrics.timed("mail", "send"):
+                get_mail().send(reply_msg)
 
             supa_update("contact", {"replied": True}, filters=[("eq", "id", id)])
+            invalidate_stats()
             flash("Reply sent successfully!", "success")
             return redirect(url_for("contacts"))
         except Exception as e:
@@ -326,42 +716,95 @@ def reply(id):
 @login_required
 def mark_seen(id):
     supa_update("contact", {"seen": True}, filters=[("eq", "id", id)])
+    invalidate_stats()
     return jsonify({"status": "ok"})
 
 
+@app.route("/contacts/bulk", methods=["POST"])
+@login_required
+def bulk_update_contacts():
+    """
+    Mark many messages seen or replied with one UPDATE ... WHERE id IN (...).
+    Body: {"ids": [1, 2, 3], "action": "seen" | "replied"}
+    """
+    body = request.get_json(silent=True) or {}
+    ids = parse_ids(body.get("ids"))
+    action = body.get("action")
+    if not ids or action not in ("seen", "replied"):
+        return jsonify({"status": "error", "error": "ids and an action of seen/replied are required"}), 400
+
+    r = supa_update("contact", {action: True}, filters=[("in", "id", ids)])
+    invalidate_stats()
+    return jsonify({"status": "ok", "action": action, "ids": [c.get("id") for c in (r.data or [])]})
+
+
 @app.route("/devices")
 @login_required
 def devices():
     try:
-        r = supa_select("devices", select="*")
-        all_devices = r.data or []
+        all_devices, next_cursor = paginate("devices", order=[("id", True)])
     except Exception as e:
         print(f"Error fetching devices: {e}")
         all_devices = []
-    return render_template("admin/devices.html", devices=all_devices)
+        next_cursor = None
+    return render_template("admin/devices.html", devices=all_devices, next_cursor=next_cursor)
 
 
 @app.route("/toggle/<int:device_id>", methods=["POST"])
 @login_required
 def toggle_status(device_id):
-    r = supa_select("devices", select="*", filters=[("eq", "id", device_id)], limit=1)
-    device = r.data[0] if r.data else None
+    try:
+        # toggle_device() (sql/devices.sql) flips the row in one atomic statement
+        r = supa_rpc("toggle_device", {"device_id": device_id})
+        device = r.data[0] if r.data else None
+        new_status = device.get("status") if device else None
+    except Exception as e:
+        print(f"toggle_device rpc unavailable, falling back to read/write: {e}")
+        r = supa_select("devices", select="*", filters=[("eq", "id", device_id)], limit=1)
+        device = r.data[0] if r.data else None
+        if device:
+            new_status = 1 if device.get("status", 0) == 0 else 0
+            supa_update("devices", {"status": new_status}, filters=[("eq", "id", device_id)])
+
     if device:
-        new_status = 1 if device.get("status", 0) == 0 else 0
-        supa_update("devices", {"status": new_status}, filters=[("eq", "id", device_id)])
+        device_feed.publish(device_id, new_status)
         return jsonify({"success": True, "device_id": device_id, "status": new_status})
     return jsonify({"success": False, "error": "Device not found"}), 404
 
 
+@app.route("/devices/status", methods=["POST"])
+@login_required
+def set_devices_status():
+    """
+    Set many devices to the same status in one UPDATE ... WHERE id IN (...).
+    Body: {"ids": [1, 2, 3], "status": 0 | 1}
+    """
+    body = request.get_json(silent=True) or {}
+    try:
+        ids = [int(i) for i in body.get("ids", [])]
+        status = int(body.get("status"))
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "ids must be integers and status 0 or 1"}), 400
+    if not ids or status not in (0, 1):
+        return jsonify({"success": False, "error": "ids must be integers and status 0 or 1"}), 400
+
+    r = supa_update("devices", {"status": status}, filters=[("in", "id", ids)])
+    updated = [d.get("id") for d in (r.data or [])]
+    for device_id in updated:
+        device_feed.publish(device_id, status)
+    return jsonify({"success": True, "status": status, "device_ids": updated})
+
+
 @app.route("/settings", methods=["GET", "POST"])
 @login_required
 def settings():
     # session["logged_in"] stores the admin id
     admin_id = session.get("logged_in")
-
-    # Fetch the admin row from Supabase
-    r = supa_select("admin", select="*", filters=[("eq", "id", admin_id)], limit=1)
-    admin = r.data[0] if r.data else None
+    admin = current_admin()
+    if admin is None:
+        session.clear()
+        flash("Please login to access this page.", "warning")
+        return redirect(url_for("admin"))
 
     if request.method == "POST":
         # Get form values
@@ -370,16 +813,52 @@ def settings():
 
         payload = {"username": username}
         if password:
-            payload["password"] = password
+            payload["password"] = hash_password(password)  # stored hashed, as admin() compares
+
+        # Usernames are unique (sql/admin.sql); say so instead of failing on the index
+        taken = supa_select(
+            "admin", select="id", filters=[("eq", "username", username), ("neq", "id", admin_id)], limit=1
+        )
+        if taken.data:
+            flash("That username is already taken.", "danger")
+            return redirect(url_for("settings"))
 
         # Update the admin row in Supabase
-        supa_update("admin", payload, filters=[("eq", "id", admin_id)])
+        try:
+            supa_update("admin", payload, filters=[("eq", "id", admin_id)])
+        except Exception as e:
+            # Lost a race for the same name, or the store rejected the row
+            print(f"Error updating admin settings: {e}")
+            flash("Could not update settings. The username may already be taken.", "danger")
+            return redirect(url_for("settings"))
         flash("Settings updated successfully!", "success")
         return redirect(url_for("dashboard"))
 
     return render_template("admin/settings.html", current_admin=admin)
 
 
+@app.context_processor
+def inject_upload_settings():
+    return {"direct_uploads": DIRECT_UPLOADS}
+
+
+@app.route("/uploads/sign", methods=["POST"])
+@login_required
+def sign_upload():
+    """Signed parameters for one direct browser-to-Cloudinary upload."""
+    folder = request.form.get("folder", "")
+    if not DIRECT_UPLOADS or folder not in UPLOAD_FOLDERS:
+        return jsonify({"error": "Direct uploads are not available"}), 400
+    import cloudinary.utils
+
+    cloudinary_uploader()
+    params = {"folder": folder, "timestamp": int(time.time())}
+    params["signature"] = cloudinary.utils.api_sign_request(params, os.getenv("CLOUD_KEY"))
+    params["api_key"] = os.getenv("CLOUD_API")
+    params["upload_url"] = f"https://api.cloudinary.com/v1_1/{os.getenv('CLOUD_NAME')}/image/upload"
+    return jsonify(params)
+
+
 @app.route("/edit_home", methods=["GET", "POST"])
 @login_required
 def edit_home():
@@ -407,16 +886,10 @@ def edit_home():
         current_first_image = home_data.get("firstimage") if home_data else None
         current_second_image = home_data.get("secondimage") if home_data else None
 
-        # Process file uploads using your existing helper function
-        new_first_image_id = save_image(
-            request.files.get('firstimage'), 
-            current_first_image,
-            'home'
-        )
-        new_second_image_id = save_image(
-            request.files.get('secondimage'), 
-            current_second_image,
-            'home'
+        # Both images upload in parallel; the form fields are firstImage/secondImage
+        new_first_image_id, new_second_image_id = save_form_images(
+            ("firstImage", current_first_image, "home"),
+            ("secondImage", current_second_image, "home"),
         )
 
         # Only add the image IDs to the payload if a new file was uploaded
@@ -430,6 +903,7 @@ def edit_home():
             supa_update("home", payload, filters=[("eq", "id", home_data.get("id"))])
         else:
             supa_insert("home", payload)
+        invalidate_home()
 
         flash("Home content updated successfully!", "success")
         return redirect(url_for("dashboard"))
@@ -440,16 +914,15 @@ def edit_home():
 @app.route("/projects")
 @login_required
 def list_projects():
-    r = supa_select("projects", select="*")
-    projects = r.data or []
-    return render_template("projects/projects_list.html", projects=projects)
+    projects, next_cursor = paginate("projects", order=[("id", False)])
+    return render_template("projects/projects_list.html", projects=projects, next_cursor=next_cursor)
 
 
 @app.route("/projects/add", methods=["GET", "POST"])
 @login_required
 def add_project():
     if request.method == "POST":
-        image_public_id = save_image(request.files.get("image"), None, "projects")
+        (image_public_id,) = save_form_images(("image", None, "projects"))
         payload = {
             "title": request.form["title"],
             "description": request.form.get("desc") or request.form.get("description"),
@@ -461,6 +934,8 @@ def add_project():
         }
 
         supa_insert("projects", payload)
+        invalidate_home()
+        invalidate_stats()
         flash("Project added successfully!", "success")
         return redirect(url_for("list_projects"))
     return render_template("projects/add_project.html")
@@ -476,7 +951,7 @@ def edit_project(id):
         return redirect(url_for("list_projects"))
     
     if request.method == "POST":
-        new_image = save_image(request.files.get("image"), project.get("image"), "projects")
+        (new_image,) = save_form_images(("image", project.get("image"), "projects"))
         payload = {
             "title": request.form["title"],
             "description": request.form.get("desc") or request.form.get("description"),
@@ -489,6 +964,8 @@ def edit_project(id):
             payload["image"] = new_image
 
         supa_update("projects", payload, filters=[("eq", "id", id)])
+        invalidate_home()
+        invalidate_stats()
         flash("Project updated successfully!", "info")
         return redirect(url_for("list_projects"))
     return render_template("projects/edit_project.html", project=project)
@@ -498,6 +975,8 @@ def edit_project(id):
 @login_required
 def delete_project(id):
     supa_update("projects", {"status": 0}, filters=[("eq", "id", id)])
+    invalidate_home()
+    invalidate_stats()
     flash("Project deleted (set inactive)!", "warning")
     return redirect(url_for("list_projects"))
 
@@ -509,16 +988,177 @@ def logout():
     return redirect(url_for("admin"))
 
 
+# -------------------------
+# Device status feed
+# -------------------------
+# Device clients either long-poll /api/status?since=<cursor> or hold open the
+# /api/status/stream SSE channel; both are answered from device_feed, which
+# toggle_status updates directly and refresh_devices() reconciles with
+# Supabase (one read per process per interval, however many clients listen).
+device_feed = ChangeFeed()
+DEVICE_REFRESH_SECONDS = float(os.getenv("DEVICE_REFRESH_SECONDS", 5))
+LONG_POLL_SECONDS = float(os.getenv("LONG_POLL_SECONDS", 25))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", 300))
+_device_refresh_lock = threading.Lock()
+_device_refreshed_at = None
+
+
+def refresh_devices():
+    global _device_refreshed_at
+    with _device_refresh_lock:
+        now = time.monotonic()
+        if _device_refreshed_at is not None and now - _device_refreshed_at < DEVICE_REFRESH_SECONDS:
+            return
+        r = supa_select("devices", select="id,status")
+        device_feed.load({d["id"]: d["status"] for d in (r.data or [])})
+        _device_refreshed_at = now
+
+
+def device_list(states):
+    return [{"id": device_id, "status": status} for device_id, status in sorted(states.items())]
+
+
+_device_etag = (None, None)
+
+
+def device_list_etag(cursor, devices_list):
+    """Content ETag of the device list, hashed once per feed version."""
+    global _device_etag
+    cached_cursor, etag = _device_etag
+    if cached_cursor != cursor:
+        etag = content_etag(devices_list)
+        _device_etag = (cursor, etag)
+    return etag
+
+
+def wait_for_device_changes(cursor, timeout):
+    """Return (cursor, changes, full) as soon as something changed after cursor, or empty on timeout."""
+    deadline = time.monotonic() + timeout
+    while True:
+        new_cursor, changes, full = device_feed.changes_since(cursor)
+        remaining = deadline - time.monotonic()
+        if changes or full or remaining <= 0:
+            return new_cursor, changes, full
+        cursor = new_cursor
+        if not device_feed.wait(cursor, min(remaining, DEVICE_REFRESH_SECONDS)):
+            refresh_devices()
+
+
 @app.route("/api/status")
 def api_status():
+    """
+    Without ?since= this returns every device, as before. With ?since=<cursor>
+    it waits up to LONG_POLL_SECONDS for a change and returns only the devices
+    that changed, plus the cursor to send next time.
+    """
+    try:
+        refresh_devices()
+        since = request.args.get("since")
+        if since is None:
+            cursor, states = device_feed.snapshot()
+            devices_list = device_list(states)
+            return conditional_response(
+                device_list_etag(cursor, devices_list),
+                device_feed.updated_at,
+                lambda: jsonify(devices_list),
+            )
+
+        cursor, changes, full = wait_for_device_changes(since, LONG_POLL_SECONDS)
+        return jsonify({"cursor": cursor, "full": full, "devices": device_list(changes)})
+    except Exception as e:
+        print(f"API Error: {e}")
+        return jsonify({"error": "Could not fetch device status"}), 500
+
+
+@app.route("/api/status/stream")
+def api_status_stream():
+    """
+    Server-Sent Events channel: a `devices` event with the full list first,
+    then one with just the changed devices each time something flips.
+    Reconnecting clients resume from Last-Event-ID.
+    """
     try:
-        r = supa_select("devices", select="*")
-        devices_list = [{"id": d.get("id"), "status": d.get("status")} for d in (r.data or [])]
-        return jsonify(devices_list)
+        refresh_devices()
     except Exception as e:
         print(f"API Error: {e}")
         return jsonify({"error": "Could not fetch device status"}), 500
 
+    start_cursor = request.headers.get("Last-Event-ID") or request.args.get("since")
+
+    def generate():
+        cursor = start_cursor
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        yield "retry: 3000\n\n"
+        while time.monotonic() < deadline:
+            new_cursor, changes, full = device_feed.changes_since(cursor)
+            if changes or full:
+                payload = json.dumps({"full": full, "devices": device_list(changes)})
+                yield f"id: {new_cursor}\nevent: devices\ndata: {payload}\n\n"
+            cursor = new_cursor
+            if not device_feed.wait(cursor, DEVICE_REFRESH_SECONDS):
+                yield ": keepalive\n\n"
+                try:
+                    refresh_devices()
+                except Exception as e:
+                    print(f"Device refresh failed: {e}")
+
+    return Response(
+        generate(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------
+# Contact form ingestion
+# -------------------------
+# Public submissions pass a per-IP token bucket and a duplicate check and are
+# inserted inside the request. CONTACT_WRITE_BEHIND=1 queues them in a bounded
+# buffer that a background thread writes in batched inserts instead; only use
+# it on long-running servers, since serverless hosts freeze that thread
+# between invocations and queued messages may never be written.
+contact_throttle = TokenBucket(
+    rate=float(os.getenv("CONTACT_RATE_PER_MINUTE", 3)) / 60,
+    capacity=int(os.getenv("CONTACT_BURST", 5)),
+)
+recent_contacts = RecentKeys(ttl=int(os.getenv("CONTACT_DUPLICATE_WINDOW", 3600)))
+CONTACT_WRITE_BEHIND = os.getenv("CONTACT_WRITE_BEHIND", "0") == "1"
+
+
+def _insert_contacts(rows):
+    supa_insert("contact", rows)
+    invalidate_stats()
+
+
+def _contacts_dropped(rows):
+    for row in rows:
+        print(f"Contact message was not saved: {json.dumps(row, default=str)}")
+
+
+contact_buffer = WriteBehindBuffer(
+    _insert_contacts,
+    max_size=int(os.getenv("CONTACT_BUFFER_SIZE", 1000)),
+    batch_size=int(os.getenv("CONTACT_BATCH_SIZE", 50)),
+    interval=float(os.getenv("CONTACT_FLUSH_SECONDS", 2)),
+    max_attempts=int(os.getenv("CONTACT_MAX_ATTEMPTS", 5)),
+    on_failed=_contacts_dropped,
+)
+atexit.register(contact_buffer.flush)
+
+
+def client_ip():
+    """The visitor's address; X-Forwarded-For is only trusted behind PROXY_COUNT proxies."""
+    hops = int(os.getenv("PROXY_COUNT", 0))
+    route = request.access_route
+    if hops and len(route) >= hops:
+        return route[-hops]
+    return request.remote_addr or "unknown"
+
+
+def contact_fingerprint(email, message):
+    normalized = " ".join(message.lower().split())
+    return hashlib.sha1(f"{email.strip().lower()}\n{normalized}".encode()).hexdigest()
+
 
 @app.route("/send_mail", methods=["POST"])
 def send_mail():
@@ -531,12 +1171,32 @@ def send_mail():
             flash("Please fill all the fields.", "danger")
             return redirect(url_for("home", _anchor="contact"))
 
+        if not contact_throttle.allow(client_ip()):
+            flash("Too many messages. Please try again in a few minutes.", "danger")
+            return redirect(url_for("home", _anchor="contact"))
+
+        # A repeat of a message we already have is acknowledged but not stored again
+        fingerprint = contact_fingerprint(email_from, message_body)
+        if recent_contacts.seen(fingerprint):
+            flash("Message saved successfully!", "success")
+            return redirect(url_for("home", _anchor="contact"))
+
+        payload = {"name": name, "email": email_from, "message": message_body, "seen": False, "replied": False}
+        if CONTACT_WRITE_BEHIND:
+            if contact_buffer.add(payload):
+                flash("Message saved successfully!", "success")
+            else:
+                print("Contact buffer full, rejecting submission")
+                recent_contacts.forget(fingerprint)
+                flash("Failed to save message. Please try again later.", "danger")
+            return redirect(url_for("home", _anchor="contact"))
+
         try:
-            payload = {"name": name, "email": email_from, "message": message_body, "seen": False, "replied": False}
-            supa_insert("contact", payload)
+            _insert_contacts([payload])
             flash("Message saved successfully!", "success")
         except Exception as e:
             print(f"DB insert failed: {e}")
+            recent_contacts.forget(fingerprint)
             flash("Failed to save message. Please try again later.", "danger")
 
         return redirect(url_for("home", _anchor="contact"))
@@ -555,6 +1215,7 @@ def add_skill():
         category_id = int(request.form["category_id"])
         payload = {"name": name, "category_id": category_id}
         supa_insert("skills", payload)
+        invalidate_home()
         flash("Skill Added Successfully ✅", "success")
         return redirect(url_for("view_skills"))
     return render_template("skills/add_skill.html", categories=categories)
@@ -585,6 +1246,7 @@ def edit_skill(skill_id):
         name = request.form["name"]
         category_id = int(request.form["category_id"])
         supa_update("skills", {"name": name, "category_id": category_id}, filters=[("eq", "id", skill_id)])
+        invalidate_home()
         flash("Skill Updated Successfully ✏️", "success")
         return redirect(url_for("view_skills"))
 
@@ -595,9 +1257,38 @@ def edit_skill(skill_id):
 @login_required
 def delete_skill(skill_id):
     supa_delete("skills", filters=[("eq", "id", skill_id)])
+    invalidate_home()
     flash("Skill Deleted Successfully 🗑️", "danger")
     return redirect(url_for("view_skills"))
 
+
+@app.route("/skills/bulk_delete", methods=["POST"])
+@login_required
+def bulk_delete_skills():
+    ids = parse_ids(request.form.getlist("ids"))
+    if not ids:
+        flash("Select at least one skill to delete.", "warning")
+        return redirect(url_for("view_skills"))
+
+    r = supa_delete("skills", filters=[("in", "id", ids)])
+    invalidate_home()
+    flash(f"{len(r.data or [])} Skills Deleted Successfully 🗑️", "danger")
+    return redirect(url_for("view_skills"))
+
+
+# Single-student JSON is read fresh on every request, so an edit through
+# any worker shows at once; its content ETag still lets repeat views answer
+# 304 without a body.
+def get_student(student_id):
+    """Return (student, etag); student is None when it doesn't exist."""
+    res = supa_select("students", select="*", filters=[("eq", "id", student_id)], limit=1)
+    student = res.data[0] if res.data else None
+    return student, content_etag(student)
+
+
+STUDENT_SEARCH_COLUMNS = ["name", "roll_no", "dpt", "email"]
+
+
 @app.route("/students")
 @login_required
 def view_students():
@@ -605,27 +1296,36 @@ def view_students():
     sort_by = request.args.get('sort', 'roll_no_asc')
 
     filters = None
-    order = None
+    order = [("roll_no", True)]
 
     if search_term:
-        filters = [('ilike', 'name', f'%{search_term}%')]
+        filters = [('search', STUDENT_SEARCH_COLUMNS, search_term)]
 
     if sort_by:
         if '_' in sort_by:
             column, direction = sort_by.rsplit('_', 1)
             if column in ['name', 'roll_no'] and direction in ['asc', 'desc']:
                 is_ascending = (direction == 'asc')
-                order = (column, is_ascending)
+                order = [(column, is_ascending)]
+
+    # id breaks ties so keyset pages stay stable with duplicate names
+    order.append(("id", True))
 
     try:
-        res = supa_select("students", select="*", filters=filters, order=order)
-        students = res.data or []
+        students, next_cursor = paginate("students", order=order, filters=filters)
     except Exception as e:
         print(f"Error fetching students: {e}")
         students = []
+        next_cursor = None
         flash("Could not fetch student records.", "danger")
         
-    return render_template("students/view_students.html", students=students, search_term=search_term, sort_by=sort_by)
+    return render_template(
+        "students/view_students.html",
+        students=students,
+        search_term=search_term,
+        sort_by=sort_by,
+        next_cursor=next_cursor,
+    )
 
 
 
@@ -644,7 +1344,7 @@ def add_student():
             return render_template("students/add_edit_student.html", student=request.form)
 
         # Handle image upload
-        image_public_id = save_image(request.files.get("image"), None, "students")
+        (image_public_id,) = save_form_images(("image", None, "students"))
 
         # Prepare data payload for Supabase
         payload = {
@@ -698,10 +1398,8 @@ def edit_student(student_id):
             return render_template("students/add_edit_student.html", student=student_for_display)
 
         # Handle image update (pass current image ID to delete it from Cloudinary)
-        new_image_id = save_image(
-            request.files.get("image"), 
-            student.get("image"), # Use original data to get current image ID
-            "students"
+        (new_image_id,) = save_form_images(
+            ("image", student.get("image"), "students")  # Use original data to get current image ID
         )
         
         # --- CHANGE 2: Build payload without None values ---
@@ -745,33 +1443,75 @@ def delete_student(student_id):
     flash("Student record deleted successfully. 🗑️", "warning")
     return redirect(url_for("view_students"))
 
+@app.route("/students/bulk_delete", methods=["POST"])
+@login_required
+def bulk_delete_students():
+    """Deletes every selected student in one request."""
+    ids = parse_ids(request.form.getlist("ids"))
+    if not ids:
+        flash("Select at least one student to delete.", "warning")
+        return redirect(url_for("view_students"))
+
+    r = supa_delete("students", filters=[("in", "id", ids)])
+    flash(f"{len(r.data or [])} student records deleted. 🗑️", "warning")
+    return redirect(url_for("view_students"))
+
+
 @app.route("/students/view/<int:student_id>")
 @login_required
 def get_student_details(student_id):
     """API endpoint to get a single student's details as JSON."""
     try:
-        res = supa_select("students", select="*", filters=[("eq", "id", student_id)], limit=1)
-        student = res.data[0] if res.data else None
+        student, etag = get_student(student_id)
         if student:
-            return jsonify(student) # Converts Python dict to JSON
+            return conditional_response(etag, None, lambda: jsonify(student), private=True)
         else:
             return jsonify({"error": "Student not found"}), 404
     except Exception as e:
         print(f"API Error fetching student {student_id}: {e}")
         return jsonify({"error": "Internal server error"}), 500
-    
+
+
+# -------------------------
+# Expense totals
+# -------------------------
+# Per-user total, count and category / month rollups, read from the
+# expense_summary() RPC (sql/expense_summary.sql) on every request. It is one
+# indexed aggregate, and every worker sees the same figures right after a write.
+def load_expense_summary(user_id):
+    try:
+        r = supa_rpc("expense_summary", {"p_user_id": user_id})
+        if r.data:
+            return ExpenseSummary.from_dict(r.data)
+    except Exception as e:
+        print(f"expense_summary rpc unavailable, summing rows: {e}")
+
+    return ExpenseSummary.from_rows(iter_rows(
+        "expense",
+        order=[("id", False)],
+        select="id,title,amount,category,date",
+        filters=[("eq", "user_id", user_id)],
+        chunk_size=int(os.getenv("EXPORT_CHUNK_SIZE", 1000)),
+    ))
+
+
+def get_expense_summary(user_id):
+    return load_expense_summary(user_id).snapshot()
+
+
 @app.route("/expenses")
 @login_required
 def expenses():
+    user_id = session["logged_in"]
     res = supa_select(
         "expense",
         select="*",
-        filters=[("eq", "user_id", session["logged_in"])],
+        filters=[("eq", "user_id", user_id)],
         order=("date", False)
     )
     expenses = res.data or []
-    total = sum(e["amount"] for e in expenses)
-    return render_template("expenses.html", expenses=expenses, total=total)
+    summary = get_expense_summary(user_id)
+    return render_template("expenses.html", expenses=expenses, total=summary["total"], summary=summary)
 
 # --- ADD EXPENSE ---
 @app.route("/expenses/add", methods=["POST"])
@@ -826,65 +1566,145 @@ def delete_expense(id):
     return redirect(url_for("expenses"))
 
 # --- EXPORT CSV ---
+class _EchoBuffer:
+    """File-like object for csv.writer that hands each line back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
 @app.route("/expenses/export/csv")
 @login_required
 def export_csv():
-    res = supa_select("expense", select="*")
-    expenses = res.data or []
-
-    si = StringIO()
-    cw = csv.writer(si)
-    cw.writerow(["Title", "Amount", "Category", "Date"])
-    for e in expenses:
-        cw.writerow([e["title"], e["amount"], e["category"], e["date"]])
+    import csv
 
-    # Encode to bytes for send_file
-    output = BytesIO()
-    output.write(si.getvalue().encode("utf-8"))
-    output.seek(0)
+    user_id = session["logged_in"]
 
-    return send_file(
-        output,
+    def generate():
+        cw = csv.writer(_EchoBuffer())
+        yield cw.writerow(["Title", "Amount", "Category", "Date"])
+        for e in iter_rows(
+            "expense",
+            order=[("date", False), ("id", False)],
+            filters=[("eq", "user_id", user_id)],
+            chunk_size=int(os.getenv("EXPORT_CHUNK_SIZE", 1000)),
+        ):
+            yield cw.writerow([e["title"], e["amount"], e["category"], e["date"]])
+
+    return Response(
+        generate(),
         mimetype="text/csv",
-        as_attachment=True,
-        download_name="expenses.csv"
+        headers={"Content-Disposition": "attachment; filename=expenses.csv"},
     )
 
 # --- EXPORT PDF ---
+# Reports are rendered on report_pool and cached per (user, ledger version).
+# The version comes from the expense_summary() RPC, so a write through any
+# worker changes the key everywhere.
+report_cache = TTLCache(ttl=int(os.getenv("REPORT_CACHE_TTL", 3600)), max_size=int(os.getenv("REPORT_CACHE_SIZE", 32)))
+report_pool = ThreadPoolExecutor(max_workers=int(os.getenv("REPORT_WORKERS", 2)))
+REPORT_WAIT_SECONDS = float(os.getenv("REPORT_WAIT_SECONDS", 8))
+_report_jobs = {}
+_report_jobs_lock = threading.Lock()
+
+
+def render_expense_report(user_id, key):
+    from reports import build_expense_report
+
+    expenses = list(iter_rows(
+        "expense",
+        order=[("date", False), ("id", False)],
+        filters=[("eq", "user_id", user_id)],
+        chunk_size=1000,
+    ))
+    pdf = build_expense_report(expenses)
+    report_cache.set(key, pdf)
+    return pdf
+
+
+def submit_report_job(user_id, key):
+    """Start rendering the report for key, or return the build already running."""
+    with _report_jobs_lock:
+        future = _report_jobs.get(key)
+        if future is None:
+            future = report_pool.submit(render_expense_report, user_id, key)
+            _report_jobs[key] = future
+            future.add_done_callback(lambda f: _report_jobs.pop(key, None))
+        return future
+
+
 @app.route("/expenses/export/pdf")
 @login_required
 def export_pdf():
-    res = supa_select(
-        "expense",
-        select="*",
-        filters=[("eq", "user_id", session["logged_in"])]
-    )
-    expenses = res.data or []
+    user_id = session["logged_in"]
+    key = (user_id, get_expense_summary(user_id)["version"])
 
-    buffer = BytesIO()  # <-- use BytesIO for binary data
-    p = canvas.Canvas(buffer)
-    y = 800
-    for e in expenses:
-        p.drawString(
-            50, y,
-            f'{e["date"]} | {e["title"]} | {e["category"]} | ₹{e["amount"]}'
-        )
-        y -= 20
-        if y < 50:
-            p.showPage()
-            y = 800
-
-    p.showPage()
-    p.save()
-    buffer.seek(0)
+    pdf = report_cache.get(key)
+    if pdf is None:
+        try:
+            pdf = submit_report_job(user_id, key).result(timeout=REPORT_WAIT_SECONDS)
+        except FutureTimeout:
+            flash("Your PDF report is being prepared. Try the export again in a few seconds.", "info")
+            return redirect(url_for("expenses"))
+        except Exception as e:
+            print(f"PDF report failed: {e}")
+            flash("Could not generate the PDF report.", "danger")
+            return redirect(url_for("expenses"))
 
     return send_file(
-        buffer,
+        BytesIO(pdf),
         as_attachment=True,
         download_name="expenses.pdf",
         mimetype="application/pdf"
     )
 
+# --- ANALYTICS ---
+# Computed by analytics.analyze() over columns filled from a chunked fetch,
+# and cached per (user, ledger version) like the PDF report.
+analytics_cache = TTLCache(ttl=int(os.getenv("ANALYTICS_CACHE_TTL", 3600)), max_size=int(os.getenv("ANALYTICS_CACHE_SIZE", 256)))
+
+
+def _int_arg(name, default, low, high):
+    try:
+        return max(low, min(high, int(request.args.get(name, default))))
+    except ValueError:
+        return default
+
+
+def get_expense_analytics(user_id, window, top):
+    from analytics import ExpenseColumns, analyze
+
+    def load():
+        columns = ExpenseColumns().extend(iter_rows(
+            "expense",
+            order=[("id", False)],
+            select="id,title,amount,category,date",
+            filters=[("eq", "user_id", user_id)],
+            chunk_size=int(os.getenv("EXPORT_CHUNK_SIZE", 1000)),
+        ))
+        return analyze(columns, window=window, top=top)
+
+    key = (user_id, get_expense_summary(user_id)["version"], window, top)
+    return analytics_cache.get_or_set(key, load)
+
+
+@app.route("/expenses/analytics")
+@login_required
+def expense_analytics():
+    report = get_expense_analytics(
+        session["logged_in"], _int_arg("window", 3, 1, 24), _int_arg("top", 10, 1, 100)
+    )
+    return render_template("expense_analytics.html", report=report)
+
+
+@app.route("/api/expenses/analytics")
+@login_required
+def expense_analytics_api():
+    report = get_expense_analytics(
+        session["logged_in"], _int_arg("window", 3, 1, 24), _int_arg("top", 10, 1, 100)
+    )
+    return jsonify(report)
+
 # Error handler
 @app.errorhandler(404)
 def not_found(e):
@@ -0,0 +1,153 @@
+# assets.py - fingerprinted, precompressed static assets
+#
+#   python assets.py        # build static/dist/ and its manifest
+#
+# Every file under static/ is copied to static/dist/ with a content hash in
+# its name. Text assets also get .gz (and .br when the brotli package is
+# installed) siblings, and PNG/JPEG images get a .webp sibling when that comes
+# out smaller. At runtime init_app() rewrites url_for('static', ...) in
+# templates to the hashed names and serves them with far-future immutable
+# cache headers, picking the best variant the client accepts. Without a
+# manifest (build never ran) everything falls back to Flask's plain static files.
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import sys
+
+from flask import request, send_from_directory, url_for
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+DIST_NAME = "dist"
+MANIFEST_NAME = "manifest.json"
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".html", ".txt"}
+WEBP_SOURCES = {".png", ".jpg", ".jpeg"}
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as fh:
+        fh.write(data)
+
+
+def _webp(path):
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    from io import BytesIO
+
+    try:
+        with Image.open(path) as img:
+            out = BytesIO()
+            lossless = img.mode in ("RGBA", "LA", "P")
+            img.save(out, "WEBP", quality=80, lossless=lossless, method=6)
+            return out.getvalue()
+    except OSError as e:
+        print(f"WebP conversion skipped for {path}: {e}")
+        return None
+
+
+def build(static_dir=STATIC_DIR):
+    """Rebuild static/dist/ and return the manifest {original path: hashed path}."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    dist_dir = os.path.join(static_dir, DIST_NAME)
+    shutil.rmtree(dist_dir, ignore_errors=True)
+    manifest = {}
+
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            src = os.path.join(root, name)
+            rel = os.path.relpath(src, static_dir).replace(os.sep, "/")
+            with open(src, "rb") as fh:
+                data = fh.read()
+
+            base, ext = os.path.splitext(rel)
+            hashed = f"{base}.{_digest(data)}{ext}"
+            out = os.path.join(dist_dir, hashed)
+            _write(out, data)
+            manifest[rel] = f"{DIST_NAME}/{hashed}"
+
+            ext = ext.lower()
+            if ext in COMPRESSIBLE:
+                _write(out + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write(out + ".br", brotli.compress(data, quality=11))
+            if ext in WEBP_SOURCES:
+                webp = _webp(src)
+                if webp is not None and len(webp) < len(data):
+                    _write(out + ".webp", webp)
+
+    _write(os.path.join(dist_dir, MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    try:
+        with open(os.path.join(static_dir, DIST_NAME, MANIFEST_NAME)) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _pick_variant(dist_dir, filename):
+    """(file to send, Content-Encoding, mimetype) for the best variant this client accepts."""
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    ext = os.path.splitext(filename)[1].lower()
+
+    if ext in WEBP_SOURCES and request.accept_mimetypes["image/webp"]:
+        if os.path.isfile(os.path.join(dist_dir, filename + ".webp")):
+            return filename + ".webp", None, "image/webp"
+    if ext in COMPRESSIBLE:
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if request.accept_encodings[encoding] and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+                return filename + suffix, encoding, mimetype
+    return filename, None, mimetype
+
+
+def init_app(app, static_dir=STATIC_DIR):
+    manifest = load_manifest(static_dir)
+    # Changes whenever a build renames an asset; pages that link assets fold it into their ETags
+    app.config["ASSET_VERSION"] = _digest(json.dumps(manifest, sort_keys=True).encode())
+    if not manifest:
+        return
+    dist_dir = os.path.join(static_dir, DIST_NAME)
+
+    def asset_url_for(endpoint, **values):
+        if endpoint == "static" and values.get("filename") in manifest:
+            values["filename"] = manifest[values["filename"]]
+        return url_for(endpoint, **values)
+
+    app.jinja_env.globals["url_for"] = asset_url_for
+
+    @app.route(f"/static/{DIST_NAME}/<path:filename>")
+    def dist_asset(filename):
+        served, encoding, mimetype = _pick_variant(dist_dir, filename)
+        response = send_from_directory(dist_dir, served, mimetype=mimetype, max_age=ONE_YEAR)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        if os.path.splitext(filename)[1].lower() in WEBP_SOURCES:
+            response.vary.add("Accept")
+        return response
+
+
+if __name__ == "__main__":
+    result = build()
+    print(f"Fingerprinted {len(result)} files into {os.path.join(STATIC_DIR, DIST_NAME)}")
+    sys.exit(0)
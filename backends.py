@@ -0,0 +1,452 @@
+# backends.py - data stores behind the supa_* helpers in app.py
+#
+#   python backends.py copy-to-sqlite [path]   # snapshot the Supabase tables into a SQLite file
+#
+# Both backends take the same arguments and return objects with .data (list
+# of row dicts, or the RPC's JSON) and .count:
+#   select(table, select, filters, orders, limit, count, offset, after)
+#   insert(table, payload)            payload: dict or list of dicts
+#   update(table, payload, filters)
+#   delete(table, filters)
+#   rpc(fn, params)                   the functions in sql/
+# filters are (op, column, value) tuples with op in eq, neq, gt, lt, is,
+# like, ilike, in, plus ("search", [columns], term); orders is a list of
+# (column, ascending); after holds the order values of the last row already
+# returned (keyset pagination).
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "sqlite.sql")
+TABLES = ["home", "admin", "projects", "categories", "skills", "contact", "devices", "students", "expense"]
+
+
+class Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _pg_value(val):
+    # Quote values inside or=(...) so commas/parentheses in names are safe
+    if isinstance(val, bool):
+        return "true" if val else "false"
+    return '"' + str(val).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SupabaseBackend:
+    """PostgREST queries through the supabase-py client."""
+
+    name = "supabase"
+
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def search_filter(columns, term):
+        """or=(...) expression matching term as a substring of any column (ILIKE, trigram-indexed)."""
+        # Escape LIKE wildcards in the user's text; * is PostgREST's own wildcard
+        term = _escape_like(term).replace("*", "")
+        return ",".join(f"{col}.ilike.{_pg_value(f'*{term}*')}" for col in columns)
+
+    @staticmethod
+    def apply_keyset(q, orders, after):
+        """
+        Restrict q to rows that sort strictly after the `after` values, i.e.
+        (c1 > v1) or (c1 = v1 and c2 > v2) or ... with < for descending columns.
+        NULLs sort last ascending and first descending (PostgREST's default),
+        so nullable columns get explicit is.null arms; id is never NULL.
+        The last order column should be unique (usually id) so pages never overlap.
+        """
+        if len(orders) == 1 and (orders[0][0] == "id" or after[0] is not None and not orders[0][1]):
+            (col, asc), val = orders[0], after[0]
+            return q.gt(col, val) if asc else q.lt(col, val)
+
+        terms = []
+        for i, (col, asc) in enumerate(orders):
+            parts = [f"{c}.is.null" if v is None else f"{c}.eq.{_pg_value(v)}" for (c, _), v in zip(orders[:i], after[:i])]
+            val = after[i]
+            if val is None:
+                if asc:
+                    continue  # nothing sorts after NULL ascending
+                parts.append(f"{col}.not.is.null")
+            elif asc and col != "id":
+                parts.append(f"or({col}.gt.{_pg_value(val)},{col}.is.null)")
+            else:
+                parts.append(f"{col}.{'gt' if asc else 'lt'}.{_pg_value(val)}")
+            terms.append(parts[0] if len(parts) == 1 else f"and({','.join(parts)})")
+        if not terms:
+            col = orders[0][0]
+            terms = [f"and({col}.is.null,{col}.not.is.null)"]  # the cursor was the last row
+        return q.or_(",".join(terms))
+
+    @staticmethod
+    def _filter(q, filters):
+        for op, col, val in filters or []:
+            if op == "eq":
+                q = q.eq(col, val)
+            elif op == "neq":
+                q = q.neq(col, val)
+            elif op == "gt":
+                q = q.gt(col, val)
+            elif op == "lt":
+                q = q.lt(col, val)
+            elif op == "is":
+                q = q.is_(col, val)
+            elif op == "like":
+                q = q.like(col, val)
+            elif op == "ilike":
+                q = q.ilike(col, val)
+            elif op == "in":
+                q = q.in_(col, val)
+            elif op == "search":
+                q = q.or_(SupabaseBackend.search_filter(col, val))
+        return q
+
+    def select(self, table, select="*", filters=None, orders=(), limit=None, count=False, offset=None, after=None):
+        q = self.client.table(table).select(select, count="exact" if count else None)
+        q = self._filter(q, filters)
+        if after is not None:
+            q = self.apply_keyset(q, orders, after)
+        for col, asc in orders:
+            q = q.order(col, desc=not asc)
+        if limit:
+            q = q.limit(limit)
+        if offset:
+            q = q.offset(offset)
+        return q.execute()
+
+    def insert(self, table, payload):
+        return self.client.table(table).insert(payload).execute()
+
+    def update(self, table, payload, filters):
+        return self._filter(self.client.table(table).update(payload), filters).execute()
+
+    def delete(self, table, filters):
+        return self._filter(self.client.table(table).delete(), filters).execute()
+
+    def rpc(self, fn, params=None):
+        return self.client.rpc(fn, params or {}).execute()
+
+
+class SQLiteBackend:
+    """
+    Embedded SQLite store for single-node deployments and offline runs.
+    One connection per thread (WAL mode, so readers never block the writer),
+    parameterized statements reused from sqlite3's per-connection statement
+    cache, and the schema and indexes from sql/sqlite.sql.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path, schema_path=SCHEMA_PATH):
+        self.path = path
+        self.schema_path = schema_path
+        self._local = threading.local()
+        self._columns = {}
+        self._not_null = {}
+        self._lock = threading.Lock()
+
+    # --- connections and schema ---
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        conn.execute("pragma journal_mode = wal")
+        conn.execute("pragma synchronous = normal")
+        conn.execute("pragma foreign_keys = on")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = self._connect()
+            with self._lock, open(self.schema_path) as fh:
+                conn.executescript(fh.read())
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    @contextmanager
+    def _atomic(self):
+        """Commit on success, roll back on error, unless inside transaction()."""
+        conn = self.connection()
+        if getattr(self._local, "in_transaction", False):
+            yield conn
+        else:
+            with conn:
+                yield conn
+
+    @contextmanager
+    def transaction(self):
+        """Run several calls as one transaction; foreign keys are checked at commit."""
+        with self._atomic() as conn:
+            conn.execute("begin")
+            conn.execute("pragma defer_foreign_keys = on")
+            self._local.in_transaction = True
+            try:
+                yield
+            finally:
+                self._local.in_transaction = False
+
+    def columns(self, table):
+        """{column: declared type} for table; unknown tables raise ValueError."""
+        cols = self._columns.get(table)
+        if cols is None:
+            info = self.connection().execute(
+                "select name, type, \"notnull\", pk from pragma_table_info(?)", (table,)
+            ).fetchall()
+            if not info:
+                raise ValueError(f"unknown table {table!r}")
+            self._not_null[table] = {r["name"] for r in info if r["notnull"] or r["pk"]}
+            cols = self._columns[table] = {r["name"]: (r["type"] or "").lower() for r in info}
+        return cols
+
+    def _ident(self, table, col):
+        if col not in self.columns(table):
+            raise ValueError(f"unknown column {table}.{col}")
+        return f'"{col}"'
+
+    def _row(self, table, row):
+        cols = self.columns(table)
+        out = dict(row)
+        for key, value in out.items():
+            if value is not None and cols.get(key) == "boolean":
+                out[key] = bool(value)
+        return out
+
+    # --- SQL building ---
+    def _where(self, table, filters, orders=(), after=None):
+        clauses, params = [], []
+        for op, col, val in filters or []:
+            if op == "search":
+                like = f"%{_escape_like(val)}%"
+                parts = [f"{self._ident(table, c)} like ? escape '\\'" for c in col]
+                clauses.append("(" + " or ".join(parts) + ")")
+                params.extend([like] * len(parts))
+                continue
+            ident = self._ident(table, col)
+            if op == "eq":
+                clauses.append(f"{ident} is null" if val is None else f"{ident} = ?")
+                params.extend([] if val is None else [val])
+            elif op in ("neq", "gt", "lt"):
+                clauses.append(f"{ident} {({'neq': '<>', 'gt': '>', 'lt': '<'})[op]} ?")
+                params.append(val)
+            elif op == "is":
+                if val is None or val == "null":
+                    clauses.append(f"{ident} is null")
+                else:
+                    clauses.append(f"{ident} = ?")
+                    params.append(val in (True, "true"))
+            elif op in ("like", "ilike"):
+                # PostgREST accepts * as the wildcard; SQLite's LIKE is case-insensitive for ASCII
+                clauses.append(f"{ident} like ?")
+                params.append(str(val).replace("*", "%"))
+            elif op == "in":
+                values = list(val)
+                clauses.append(f"{ident} in ({','.join('?' * len(values))})" if values else "0")
+                params.extend(values)
+            else:
+                raise ValueError(f"unsupported filter {op!r}")
+
+        if after is not None:
+            idents = [self._ident(table, c) for c, _ in orders]
+            not_null = self._not_null[table]
+            if len({asc for _, asc in orders}) == 1 and all(c in not_null for c, _ in orders) and None not in after:
+                # One direction: a row-value comparison the (c1, c2) index can seek on
+                op = ">" if orders[0][1] else "<"
+                clauses.append(f"({', '.join(idents)}) {op} ({', '.join('?' * len(idents))})")
+                params.extend(after)
+            else:
+                # Nulls sort last ascending and first descending, as ordered in select()
+                terms = []
+                for i, (col, asc) in enumerate(orders):
+                    parts = [f"{idents[j]} is null" if after[j] is None else f"{idents[j]} = ?" for j in range(i)]
+                    values = [v for v in after[:i] if v is not None]
+                    if after[i] is None:
+                        if asc:
+                            continue  # nothing sorts after NULL ascending
+                        parts.append(f"{idents[i]} is not null")
+                    elif asc and col not in not_null:
+                        parts.append(f"({idents[i]} > ? or {idents[i]} is null)")
+                        values.append(after[i])
+                    else:
+                        parts.append(f"{idents[i]} {'>' if asc else '<'} ?")
+                        values.append(after[i])
+                    terms.append("(" + " and ".join(parts) + ")")
+                    params.extend(values)
+                clauses.append("(" + " or ".join(terms) + ")" if terms else "0")
+
+        return (" where " + " and ".join(clauses)) if clauses else "", params
+
+    def _select_list(self, table, select):
+        """Plain column list plus embedded resources, e.g. "*, categories(name)"."""
+        columns, embeds, depth, current = [], [], 0, ""
+        for ch in select.replace(" ", "") + ",":
+            if ch == "," and depth == 0:
+                if current.endswith(")"):
+                    target, _, inner = current[:-1].partition("(")
+                    embeds.append((target, inner))
+                elif current:
+                    columns.append(current)
+                current = ""
+                continue
+            depth += ch == "("
+            depth -= ch == ")"
+            current += ch
+        if not columns or "*" in columns:
+            return "*", embeds
+        return ", ".join(self._ident(table, c) for c in columns), embeds
+
+    def _embed(self, table, rows, target, inner):
+        """Attach the many-to-one row from target (via <target singular>_id) to every row."""
+        singular = target[:-3] + "y" if target.endswith("ies") else target.rstrip("s")
+        fk = next((c for c in (f"{singular}_id", f"{target}_id") if c in self.columns(table)), None)
+        keys = sorted({r.get(fk) for r in rows if fk and r.get(fk) is not None})
+        found = {}
+        if keys:
+            cols = "*" if inner in ("", "*") else ", ".join(self._ident(target, c) for c in inner.split(",") if c)
+            sql = f'select "id" as "__id", {cols} from "{target}" where "id" in ({",".join("?" * len(keys))})'
+            for r in self.connection().execute(sql, keys):
+                row = self._row(target, r)
+                found[row.pop("__id")] = row
+        for r in rows:
+            r[target] = found.get(r.get(fk))
+
+    # --- operations ---
+    def select(self, table, select="*", filters=None, orders=(), limit=None, count=False, offset=None, after=None):
+        columns, embeds = self._select_list(table, select)
+        where, params = self._where(table, filters, orders, after)
+        sql = f'select {columns} from "{table}"{where}'
+        if orders:
+            # PostgREST puts nulls last ascending and first descending
+            sql += " order by " + ", ".join(
+                f"{self._ident(table, c)} {'asc nulls last' if asc else 'desc nulls first'}" for c, asc in orders
+            )
+        if limit or offset:
+            sql += " limit ? offset ?"
+            params = params + [limit or -1, offset or 0]
+
+        conn = self.connection()
+        rows = [self._row(table, r) for r in conn.execute(sql, params)]
+        for target, inner in embeds:
+            self._embed(table, rows, target, inner)
+        total = None
+        if count:
+            count_where, count_params = self._where(table, filters, orders, after)
+            total = conn.execute(f'select count(*) from "{table}"{count_where}', count_params).fetchone()[0]
+        return Result(rows, total)
+
+    def insert(self, table, payload):
+        items = payload if isinstance(payload, list) else [payload]
+        created = []
+        with self._atomic() as conn:
+            for item in items:
+                cols = list(item)
+                sql = (f'insert into "{table}" ({", ".join(self._ident(table, c) for c in cols)}) '
+                       f'values ({", ".join("?" * len(cols))}) returning *')
+                created.extend(self._row(table, r) for r in conn.execute(sql, [item[c] for c in cols]))
+        return Result(created)
+
+    def update(self, table, payload, filters):
+        cols = list(payload)
+        where, params = self._where(table, filters)
+        sql = f'update "{table}" set {", ".join(f"{self._ident(table, c)} = ?" for c in cols)}{where} returning *'
+        with self._atomic() as conn:
+            rows = [self._row(table, r) for r in conn.execute(sql, [payload[c] for c in cols] + params)]
+        return Result(rows)
+
+    def delete(self, table, filters):
+        where, params = self._where(table, filters)
+        with self._atomic() as conn:
+            rows = [self._row(table, r) for r in conn.execute(f'delete from "{table}"{where} returning *', params)]
+        return Result(rows)
+
+    def rpc(self, fn, params=None):
+        handler = getattr(self, f"_rpc_{fn}", None)
+        if handler is None:
+            raise LookupError(f"function {fn} does not exist")
+        return Result(handler(**(params or {})))
+
+    # --- the functions in sql/, as SQLite statements ---
+    def _rpc_dashboard_stats(self):
+        row = self.connection().execute(
+            """
+            select (select count(*) from contact where seen = 0)    as not_seen,
+                   (select count(*) from contact where replied = 0) as not_replied,
+                   (select count(*) from contact)                   as contacts,
+                   (select count(*) from projects where status = 1) as projects
+            """
+        ).fetchone()
+        return dict(row)
+
+    def _rpc_toggle_device(self, device_id):
+        with self._atomic() as conn:
+            rows = conn.execute(
+                "update devices set status = case when status = 0 then 1 else 0 end "
+                "where id = ? returning id, status",
+                (device_id,),
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def _rpc_expense_summary(self, p_user_id):
+        conn = self.connection()
+        total, count = conn.execute(
+            "select coalesce(sum(amount), 0), count(*) from expense where user_id = ?", (p_user_id,)
+        ).fetchone()
+        by_category = conn.execute(
+            "select coalesce(category, 'Other'), sum(amount) from expense where user_id = ? group by 1",
+            (p_user_id,),
+        ).fetchall()
+        by_month = conn.execute(
+            # Same month key as aggregates._month: undated rows roll up under 'unknown'
+            "select coalesce(nullif(substr(date, 1, 7), ''), 'unknown'), sum(amount) from expense"
+            " where user_id = ? group by 1",
+            (p_user_id,),
+        ).fetchall()
+        version = conn.execute(
+            "select version from expense_version where user_id = ?", (p_user_id,)
+        ).fetchone()
+        return {
+            "total": total,
+            "count": count,
+            "by_category": {k: v for k, v in by_category},
+            "by_month": {k: v for k, v in by_month},
+            "version": f"{count}-{version[0] if version else 0}",
+        }
+
+
+def copy_tables(source, target, tables=TABLES, chunk_size=1000):
+    """
+    Replace target's rows with source's in one transaction; columns target
+    lacks are dropped. tables are in dependency order (referenced tables
+    first), so they are emptied in reverse and filled forwards.
+    """
+    with target.transaction():
+        for table in reversed(tables):
+            target.delete(table, [])
+        for table in tables:
+            columns = target.columns(table)
+            copied, after = 0, None
+            while True:
+                rows = source.select(table, orders=[("id", True)], limit=chunk_size, after=after).data or []
+                if rows:
+                    target.insert(table, [{k: v for k, v in r.items() if k in columns} for r in rows])
+                    copied += len(rows)
+                    after = [rows[-1]["id"]]
+                if len(rows) < chunk_size:
+                    break
+            print(f"{table}: {copied} rows")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "copy-to-sqlite":
+        print("usage: python backends.py copy-to-sqlite [path]")
+        sys.exit(2)
+    from database import SQLITE_PATH, supabase
+
+    copy_tables(SupabaseBackend(supabase), SQLiteBackend(sys.argv[2] if len(sys.argv) > 2 else SQLITE_PATH))
@@ -0,0 +1,399 @@
+# benchmarks/fake_supabase.py - in-process stand-in for the PostgREST client surface app.py uses
+#
+# Implements table(...).select/insert/update/delete with the filters,
+# ordering and paging the supa_* helpers issue (eq, neq, gt, lt, gte, lte,
+# is_, like, ilike, in_, or_ with nested and(...), order, limit, offset,
+# range, exact counts) plus the RPCs from sql/. Every execute() sleeps for
+# `latency` (+ up to `jitter`) seconds outside the data lock, so concurrent
+# requests overlap their round trips the way they do against the real API.
+import copy
+import hashlib
+import itertools
+import random
+import re
+import threading
+import time
+from collections import Counter
+from operator import itemgetter
+from datetime import date, timedelta
+
+from aggregates import VERSION_FIELDS  # benchmarks/routes.py puts the repo root on sys.path
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeError(Exception):
+    pass
+
+
+def _split(expr):
+    """Split a PostgREST or=/and= list on top-level commas (outside quotes and parentheses)."""
+    parts, current, depth, quoted, i = [], "", 0, False, 0
+    while i < len(expr):
+        ch = expr[i]
+        if quoted and ch == "\\":
+            current += expr[i:i + 2]
+            i += 2
+            continue
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+        i += 1
+    parts.append(current)
+    return parts
+
+
+def _unquote(value):
+    if value.startswith('"') and value.endswith('"'):
+        value = value[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return value
+
+
+def _coerce(sample, value):
+    """Convert a filter value from the URL to the type of the stored column."""
+    if isinstance(sample, bool):
+        return value in (True, "true")
+    if isinstance(sample, int) and not isinstance(value, int):
+        return int(value)
+    if isinstance(sample, float) and not isinstance(value, float):
+        return float(value)
+    return value
+
+
+def _like_regex(pattern, wildcard="%", flags=0):
+    out, i = "", 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\" and i + 1 < len(pattern):
+            out += re.escape(pattern[i + 1])
+            i += 2
+            continue
+        out += ".*" if ch in (wildcard, "%") else "." if ch == "_" else re.escape(ch)
+        i += 1
+    return re.compile(f"^{out}$", flags | re.S)
+
+
+_COMPARE = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def _compare(col, op, value):
+    def pred(row):
+        current = row.get(col)
+        if current is None:
+            return op == "neq" and value is not None
+        return _COMPARE[op](current, _coerce(current, value))
+    return pred
+
+
+def _like(col, pattern, flags=0, wildcard="%"):
+    rx = _like_regex(pattern, wildcard, flags)
+    return lambda row: bool(rx.match(str(row.get(col) if row.get(col) is not None else "")))
+
+
+def _parse_condition(term):
+    if term.startswith("and(") or term.startswith("or("):
+        inner = [_parse_condition(t) for t in _split(term[term.index("(") + 1:-1])]
+        if term.startswith("and("):
+            return lambda row: all(p(row) for p in inner)
+        return lambda row: any(p(row) for p in inner)
+    col, op, value = term.split(".", 2)
+    if op == "not":
+        inner = _parse_condition(f"{col}.{value}")
+        return lambda row: not inner(row)
+    value = _unquote(value)
+    if op in ("like", "ilike"):
+        return _like(col, value, re.I if op == "ilike" else 0, wildcard="*")
+    if op == "is":
+        return lambda row: row.get(col) is None
+    return _compare(col, op, value)
+
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.count = None
+        self.payload = None
+        self.predicates = []
+        self.orders = []
+        self.limit_n = None
+        self.offset_n = 0
+
+    # --- verbs ---
+    def select(self, columns="*", count=None):
+        self.op, self.columns, self.count = "select", columns, count
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # --- filters ---
+    def _where(self, predicate):
+        self.predicates.append(predicate)
+        return self
+
+    def eq(self, col, value):
+        return self._where(_compare(col, "eq", value))
+
+    def neq(self, col, value):
+        return self._where(_compare(col, "neq", value))
+
+    def gt(self, col, value):
+        return self._where(_compare(col, "gt", value))
+
+    def gte(self, col, value):
+        return self._where(_compare(col, "gte", value))
+
+    def lt(self, col, value):
+        return self._where(_compare(col, "lt", value))
+
+    def lte(self, col, value):
+        return self._where(_compare(col, "lte", value))
+
+    def is_(self, col, value):
+        return self._where(lambda row: row.get(col) is None)
+
+    def in_(self, col, values):
+        values = list(values)
+        return self._where(lambda row: row.get(col) in values)
+
+    def like(self, col, pattern):
+        return self._where(_like(col, pattern))
+
+    def ilike(self, col, pattern):
+        return self._where(_like(col, pattern, re.I))
+
+    def or_(self, expr):
+        terms = [_parse_condition(t) for t in _split(expr)]
+        return self._where(lambda row: any(p(row) for p in terms))
+
+    # --- shaping ---
+    def order(self, col, desc=False):
+        self.orders.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def offset(self, n):
+        self.offset_n = n
+        return self
+
+    def range(self, start, end):
+        self.offset_n, self.limit_n = start, end - start + 1
+        return self
+
+    def _project(self, row):
+        out = {}
+        for column in _split(self.columns.replace(" ", "")):
+            if column == "*":
+                out.update(row)
+            elif column.endswith(")"):
+                # Embedded many-to-one resource, e.g. categories(name) via category_id
+                table, _, inner = column[:-1].partition("(")
+                out[table] = self.db.embed(table, row, inner)
+            else:
+                out[column] = row.get(column)
+        return out
+
+    def execute(self):
+        self.db.pause()
+        with self.db.lock:
+            self.db.calls[(self.table, self.op)] += 1
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.op == "insert":
+                items = self.payload if isinstance(self.payload, list) else [self.payload]
+                created = []
+                for item in items:
+                    row = dict(item)
+                    row.setdefault("id", next(self.db.ids))
+                    rows.append(row)
+                    created.append(dict(row))
+                return FakeResponse(created)
+
+            hits = [r for r in rows if all(p(r) for p in self.predicates)]
+            if self.op == "update":
+                for r in hits:
+                    r.update(self.payload)
+                return FakeResponse(copy.deepcopy(hits))
+            if self.op == "delete":
+                doomed = {id(r) for r in hits}
+                rows[:] = [r for r in rows if id(r) not in doomed]
+                return FakeResponse(copy.deepcopy(hits))
+
+            for col, desc in reversed(self.orders):
+                hits.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+            total = len(hits)
+            hits = hits[self.offset_n:]
+            if self.limit_n is not None:
+                hits = hits[:self.limit_n]
+            return FakeResponse([self._project(r) for r in hits], total if self.count else None)
+
+
+class FakeRpc:
+    def __init__(self, db, fn, params):
+        self.db, self.fn, self.params = db, fn, params or {}
+
+    def execute(self):
+        handler = RPCS.get(self.fn)
+        self.db.pause()
+        with self.db.lock:
+            self.db.calls[(self.fn, "rpc")] += 1
+            if handler is None:
+                raise FakeError(f"function {self.fn} does not exist")
+            return FakeResponse(handler(self.db.tables, self.params))
+
+
+class FakeSupabase:
+    """Drop-in for the supabase client object: table(), rpc() and the row store behind them."""
+
+    def __init__(self, tables=None, latency=0.0, jitter=0.0):
+        self.tables = tables if tables is not None else {}
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.ids = itertools.count(max((r.get("id") or 0 for rows in self.tables.values() for r in rows), default=0) + 1)
+
+    def pause(self):
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def embed(self, table, row, columns):
+        singular = table[:-3] + "y" if table.endswith("ies") else table.rstrip("s")
+        key = row.get(f"{singular}_id", row.get(f"{table}_id"))
+        for target in self.tables.get(table, []):
+            if target.get("id") == key:
+                if columns == "*":
+                    return dict(target)
+                return {c: target.get(c) for c in columns.split(",")}
+        return None
+
+    def rpc(self, fn, params=None):
+        return FakeRpc(self, fn, params)
+
+
+# --- RPCs from sql/ ---
+def _dashboard_stats(tables, params):
+    contact = tables.get("contact", [])
+    return {
+        "not_seen": sum(1 for c in contact if not c.get("seen")),
+        "not_replied": sum(1 for c in contact if not c.get("replied")),
+        "contacts": len(contact),
+        "projects": sum(1 for p in tables.get("projects", []) if p.get("status") == 1),
+    }
+
+
+def _toggle_device(tables, params):
+    for device in tables.get("devices", []):
+        if device.get("id") == params.get("device_id"):
+            device["status"] = 0 if device.get("status") else 1
+            return [{"id": device["id"], "status": device["status"]}]
+    return []
+
+
+def _expense_summary(tables, params):
+    by_category, by_month, total, count, fields = Counter(), Counter(), 0.0, 0, []
+    version_fields = itemgetter(*VERSION_FIELDS)
+    for e in tables.get("expense", []):
+        if e.get("user_id") != params.get("p_user_id"):
+            continue
+        total += e.get("amount") or 0
+        count += 1
+        by_category[e.get("category") or "Other"] += e.get("amount") or 0
+        by_month[str(e.get("date") or "")[:7] or "unknown"] += e.get("amount") or 0
+        fields.append(version_fields(e))
+    # Python's hash is per process, like the caches keyed on it, and far cheaper than md5 per row
+    return {"total": total, "count": count, "by_category": dict(by_category), "by_month": dict(by_month),
+            "version": f"{count}-{hash(tuple(fields)) & (1 << 64) - 1:016x}"}
+
+
+RPCS = {
+    "dashboard_stats": _dashboard_stats,
+    "toggle_device": _toggle_device,
+    "expense_summary": _expense_summary,
+}
+
+
+DEFAULT_SIZES = {
+    "projects": 30,
+    "categories": 6,
+    "skills": 40,
+    "contact": 500,
+    "devices": 20,
+    "students": 2000,
+    "expense": 5000,
+}
+
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin"
+
+
+def make_tables(sizes=None, user_id=1, seed=7):
+    """Deterministic rows for every table the routes read, sized per table name."""
+    sizes = {**DEFAULT_SIZES, **(sizes or {})}
+    rnd = random.Random(seed)
+    start = date(2021, 1, 1)
+    categories = ["Food", "Travel", "Shopping", "Bills"]
+    depts = ["CSE", "ECE", "EEE", "MECH", "CIVIL", "IT"]
+    return {
+        "home": [{"id": 1, "name": "Benchmark", "title": "Developer", "description": "About me",
+                  "firstimage": "home/first", "secondimage": "home/second", "resume": "", "email": "me@example.com"}],
+        "admin": [{"id": user_id, "username": ADMIN_USERNAME,
+                   "password": hashlib.md5(ADMIN_PASSWORD.encode()).hexdigest()}],
+        "projects": [{"id": i, "title": f"Project {i}", "desc": "A project " * 10, "image": f"projects/p{i}",
+                      "tech_stack": "Python, Flask", "github": "", "link": "", "status": 1 if i % 3 else 0}
+                     for i in range(1, sizes["projects"] + 1)],
+        "categories": [{"id": i, "name": f"Category {i}"} for i in range(1, sizes["categories"] + 1)],
+        "skills": [{"id": i, "name": f"Skill {i}", "category_id": rnd.randint(1, max(1, sizes["categories"]))}
+                   for i in range(1, sizes["skills"] + 1)],
+        "contact": [{"id": i, "name": f"Visitor {i}", "email": f"visitor{i}@example.com", "message": "Hello " * 20,
+                     "seen": rnd.random() < 0.7, "replied": rnd.random() < 0.5}
+                    for i in range(1, sizes["contact"] + 1)],
+        "devices": [{"id": i, "name": f"Device {i}", "status": rnd.randint(0, 1)} for i in range(1, sizes["devices"] + 1)],
+        "students": [{"id": i, "name": f"Student {i}", "roll_no": f"R{i:05d}", "dpt": rnd.choice(depts),
+                      "email": f"student{i}@example.com", "ph_no": f"9{i:09d}", "dob": "2004-01-01",
+                      "address": "", "f_name": "", "f_phno": "", "m_name": "", "m_phno": "", "aadhaar_no": "",
+                      "image": f"students/s{i}"}
+                     for i in range(1, sizes["students"] + 1)],
+        "expense": [{"id": i, "title": f"Expense {i}", "amount": round(rnd.lognormvariate(5, 1), 2),
+                     "category": rnd.choice(categories),
+                     "date": (start + timedelta(days=rnd.randint(0, 5 * 365))).isoformat(),
+                     "notes": "", "user_id": user_id}
+                    for i in range(1, sizes["expense"] + 1)],
+    }
@@ -0,0 +1,339 @@
+# benchmarks/routes.py - route-level load and latency benchmark against a local Supabase stand-in
+#
+#   python benchmarks/routes.py                               # every route, 20 ms simulated round trips
+#   python benchmarks/routes.py --latency-ms 50 --concurrency 16 --requests 300
+#   python benchmarks/routes.py --route /students --size students=20000
+#   python benchmarks/routes.py --save-baseline benchmarks/baseline.json
+#   python benchmarks/routes.py --baseline benchmarks/baseline.json                       # query counts only
+#   python benchmarks/routes.py --baseline benchmarks/baseline.json --max-regression 0.5  # p95 latency too
+#   python benchmarks/routes.py --backend sqlite             # same rows in a local SQLite file
+#
+# app.backend is swapped for a SupabaseBackend over fake_supabase.FakeSupabase
+# (seeded with --size table=N rows, each call delayed by --latency-ms/--jitter-ms)
+# or, with --backend sqlite, an SQLiteBackend holding the same rows, and
+# every public and admin route (see ROUTES for the few left out) is driven
+# through Flask test clients from --concurrency threads; the long-poll is
+# measured on its catch-up path and the event stream up to its first event. Reports p50/p95/p99 latency, throughput and
+# queries per request (counted at the backend). With --baseline it exits
+# non-zero when a route's query count rises, and with --max-regression also
+# when p95 latency grows by more than that fraction and --min-delta-ms.
+# Latencies depend on the machine and vary a lot between runs under load, so
+# they don't gate by default; the baseline records the machine it ran on.
+import argparse
+import itertools
+import json
+import os
+import platform
+import queue
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_supabase import ADMIN_PASSWORD, ADMIN_USERNAME, FakeSupabase, make_tables  # noqa: E402
+
+
+class Json(dict):
+    """A request body sent as JSON instead of form data."""
+
+
+def _contact_form(i):
+    return {"name": f"Visitor {i}", "email": f"load{i}@example.com", "message": f"Benchmark message {i}"}
+
+
+def _project_form(i):
+    return {"title": f"Benchmark project {i}", "desc": "Added by the benchmark", "status": "1", "tech_stack": "Python"}
+
+
+def _student_form(i):
+    return {"name": f"Benchmark student {i}", "roll_no": f"B{i:06d}", "dpt": "CSE", "email": f"bench{i}@example.com"}
+
+
+def _expense_form(i):
+    return {"title": f"Benchmark expense {i}", "amount": "12.50", "category": "Food", "date": "2026-01-15"}
+
+
+# Ids no seeded row has, so the bulk deletes run their query without emptying the tables later routes read
+MISSING_IDS = [str(n) for n in range(900001, 900011)]
+
+# Routes measured by reading only up to their first `event:` (SSE never ends on its own)
+FIRST_EVENT_ONLY = {"status stream"}
+
+# (name, method, path, form data, Json(...) or callable(i) -> either, needs login)
+# Writes come last so the reads above see the seeded tables. Not driven: the
+# single-row deletes and logout (they would consume the seeded rows or the
+# pooled sessions), the reply POST (it sends mail), /uploads/sign (needs
+# Cloudinary credentials) and /metrics.
+ROUTES = [
+    ("home", "GET", "/", None, False),
+    ("login page", "GET", "/admin", None, False),
+    ("device status", "GET", "/api/status", None, False),
+    ("contact form", "POST", "/send_mail", _contact_form, False),
+    ("dashboard", "GET", "/dashboard", None, True),
+    ("contacts", "GET", "/contacts", None, True),
+    ("reply form", "GET", "/reply/1", None, True),
+    ("mark seen", "POST", "/mark_seen/1", None, True),
+    ("devices", "GET", "/devices", None, True),
+    ("toggle device", "POST", "/toggle/1", None, True),
+    ("settings", "GET", "/settings", None, True),
+    ("edit home", "GET", "/edit_home", None, True),
+    ("projects", "GET", "/projects", None, True),
+    ("skills", "GET", "/skills", None, True),
+    ("students", "GET", "/students", None, True),
+    ("student search", "GET", "/students?search=Student+12", None, True),
+    ("student details", "GET", "/students/view/1", None, True),
+    ("expenses", "GET", "/expenses", None, True),
+    ("expense analytics", "GET", "/api/expenses/analytics", None, True),
+    ("export csv", "GET", "/expenses/export/csv", None, True),
+    ("export pdf", "GET", "/expenses/export/pdf", None, True),
+    ("analytics page", "GET", "/expenses/analytics", None, True),
+    ("status catch-up", "GET", "/api/status?since=stale", None, False),
+    ("status stream", "GET", "/api/status/stream", None, False),
+    ("set devices", "POST", "/devices/status", Json(ids=[1, 2, 3], status=1), True),
+    ("bulk contacts", "POST", "/contacts/bulk", Json(ids=[1, 2, 3], action="seen"), True),
+    ("bulk del skills", "POST", "/skills/bulk_delete", {"ids": MISSING_IDS}, True),
+    ("bulk del students", "POST", "/students/bulk_delete", {"ids": MISSING_IDS}, True),
+    ("save settings", "POST", "/settings", {"username": ADMIN_USERNAME, "password": ""}, True),
+    ("save home", "POST", "/edit_home", {"name": "Benchmark", "title": "Developer", "about": "About me"}, True),
+    ("add project", "POST", "/projects/add", _project_form, True),
+    ("edit project", "POST", "/projects/edit/1", {"title": "Project 1", "desc": "Edited", "status": "1"}, True),
+    ("add skill", "POST", "/skills/add", lambda i: {"name": f"Benchmark skill {i}", "category_id": "1"}, True),
+    ("edit skill", "POST", "/skills/edit/1", {"name": "Skill 1", "category_id": "1"}, True),
+    ("add student", "POST", "/students/add", _student_form, True),
+    ("edit student", "POST", "/students/edit/1", {"name": "Student 1", "roll_no": "R00001", "dpt": "CSE"}, True),
+    ("add expense", "POST", "/expenses/add", _expense_form, True),
+    ("edit expense", "POST", "/expenses/edit/1", {"title": "Expense 1", "amount": "10", "category": "Food",
+                                                   "date": "2026-01-01"}, True),
+]
+
+
+def parse_sizes(values):
+    sizes = {}
+    for value in values or []:
+        table, _, n = value.partition("=")
+        sizes[table] = int(n)
+    return sizes
+
+
+class CountingBackend:
+    """Wraps a data backend and counts the calls made through it."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        method = getattr(self.inner, name)
+        if name not in ("select", "insert", "update", "delete", "rpc"):
+            return method
+
+        def counted(*args, **kwargs):
+            with self._lock:
+                self.calls += 1
+            return method(*args, **kwargs)
+
+        return counted
+
+
+def make_backend(kind, tables, latency, jitter, path):
+    """The backend under test, loaded with tables: the Supabase fake or a fresh SQLite file."""
+    from backends import SQLiteBackend, SupabaseBackend
+
+    if kind == "supabase":
+        return SupabaseBackend(FakeSupabase(tables, latency=latency, jitter=jitter))
+    if os.path.exists(path):
+        os.remove(path)
+    store = SQLiteBackend(path)
+    for table, rows in tables.items():
+        columns = store.columns(table)
+        for i in range(0, len(rows), 1000):
+            store.insert(table, [{k: v for k, v in r.items() if k in columns} for r in rows[i:i + 1000]])
+    return store
+
+
+def load_app(backend):
+    """Import app.py with placeholder settings and point its data helpers at backend."""
+    os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    os.environ.setdefault("SUPABASE_KEY", "benchmark")
+    os.environ.setdefault("FLASK_SECRET_KEY", "benchmark")
+    import app as app_module
+
+    app_module.backend = backend
+    return app_module
+
+
+def quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Driver:
+    """
+    Fixed pools of logged-in and anonymous test clients, created up front so
+    logins don't land in any route's numbers; each request borrows one.
+    """
+
+    def __init__(self, app_module, size):
+        self.app_module = app_module
+        self.pools = {False: queue.Queue(), True: queue.Queue()}
+        for _ in range(size):
+            self.pools[False].put(app_module.app.test_client())
+            client = app_module.app.test_client()
+            client.post("/admin", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD})
+            self.pools[True].put(client)
+        self.counter = itertools.count()
+
+    def request(self, route):
+        name, method, path, data, login = route
+        i = next(self.counter)
+        if callable(data):
+            data = data(i)
+        # A distinct address per request, so the contact form throttle isn't what gets measured
+        environ = {"REMOTE_ADDR": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}"}
+        body = {"json": data} if isinstance(data, Json) else {"data": data}
+        client = self.pools[login].get()
+        try:
+            start = time.perf_counter()
+            response = client.open(path, method=method, environ_base=environ, **body)
+            if name in FIRST_EVENT_ONLY:
+                for chunk in response.response:
+                    if b"event:" in (chunk if isinstance(chunk, bytes) else chunk.encode()):
+                        break
+                response.close()
+            else:
+                response.get_data()  # drain streamed bodies (CSV export)
+            return time.perf_counter() - start, response.status_code
+        finally:
+            self.pools[login].put(client)
+
+
+def bench_route(driver, backend, route, requests, concurrency, warmup):
+    for _ in range(warmup):
+        driver.request(route)
+    calls_before = backend.calls
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(lambda _: driver.request(route), range(requests)))
+    wall = time.perf_counter() - start
+    # Counted at the backend, so streamed responses and write-behind flushes are included
+    driver.app_module.contact_buffer.flush()
+    queries = (backend.calls - calls_before) / requests
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        "requests": requests,
+        "errors": sum(1 for s in samples if s[1] >= 400),
+        "p50_ms": round(quantile(latencies, 0.50), 2),
+        "p95_ms": round(quantile(latencies, 0.95), 2),
+        "p99_ms": round(quantile(latencies, 0.99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "rps": round(requests / wall, 1) if wall else 0.0,
+        "queries": round(queries, 2),
+    }
+
+
+def compare(results, baseline, max_regression, min_delta_ms):
+    """
+    Print deltas against baseline; return the names of routes that regressed.
+    Query count increases always count; a p95 slowdown counts only when
+    max_regression is set and it exceeds both that fraction and min_delta_ms.
+    """
+    regressed = []
+    print()
+    print(f"{'vs baseline':<20} {'p95':>18} {'rps':>18} {'queries':>16}")
+    for name, result in results.items():
+        before = baseline.get("routes", {}).get(name)
+        if not before:
+            print(f"{name:<20} {'(new route)':>18}")
+            continue
+        p95_delta = result["p95_ms"] - before["p95_ms"]
+        p95_change = p95_delta / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (result["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        flag = ""
+        slower = max_regression is not None and p95_change > max_regression and p95_delta > min_delta_ms
+        if slower or result["queries"] > before["queries"] + 0.01:
+            regressed.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<20} {before['p95_ms']:7.1f} -> {result['p95_ms']:7.1f}"
+              f" {before['rps']:7.1f} -> {result['rps']:7.1f}"
+              f" {before['queries']:5.1f} -> {result['queries']:5.1f}{flag}")
+        if abs(rps_change) > (max_regression or 0.25) and not flag:
+            print(f"{'':<20} throughput changed {rps_change:+.0%}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route-level load benchmark for app.py")
+    parser.add_argument("--backend", choices=["supabase", "sqlite"], default="supabase",
+                        help="the in-process Supabase fake, or a real SQLite file seeded with the same rows")
+    parser.add_argument("--sqlite-path", default=os.path.join(os.environ.get("TMPDIR", "/tmp"), "routes-bench.sqlite3"))
+    parser.add_argument("--latency-ms", type=float, default=20, help="simulated Supabase round trip")
+    parser.add_argument("--jitter-ms", type=float, default=5, help="extra random delay per call, 0..jitter")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured requests per route first")
+    parser.add_argument("--size", action="append", metavar="TABLE=ROWS", help="rows to seed, e.g. expense=20000")
+    parser.add_argument("--route", action="append", help="only routes whose path or name contains this")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier --save-baseline to compare against")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, help="also fail on a p95 slowdown above this fraction")
+    parser.add_argument("--min-delta-ms", type=float, default=50, help="p95 slowdowns smaller than this never fail")
+    args = parser.parse_args()
+
+    tables = make_tables(parse_sizes(args.size))
+    backend = CountingBackend(make_backend(
+        args.backend, tables, args.latency_ms / 1000, args.jitter_ms / 1000, args.sqlite_path
+    ))
+    driver = Driver(load_app(backend), args.concurrency)
+
+    routes = [r for r in ROUTES if not args.route or any(f in r[0] or f in r[2] for f in args.route)]
+    config = {k: getattr(args, k) for k in ("backend", "latency_ms", "jitter_ms", "requests", "concurrency", "warmup")}
+    config["sizes"] = {table: len(rows) for table, rows in tables.items()}
+    config["machine"] = {"platform": platform.platform(), "python": platform.python_version(), "cpus": os.cpu_count()}
+    where = (f"Supabase latency {args.latency_ms:g}+{args.jitter_ms:g} ms" if args.backend == "supabase"
+             else f"SQLite at {args.sqlite_path}")
+    print(f"{len(routes)} routes, {args.requests} requests each, concurrency {args.concurrency}, {where}")
+    print()
+    print(f"{'route':<20} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'errors':>7}")
+
+    results = {}
+    for route in routes:
+        result = bench_route(driver, backend, route, args.requests, args.concurrency, args.warmup)
+        results[route[0]] = result
+        print(f"{route[0]:<20} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} {result['p99_ms']:8.1f}"
+              f" {result['rps']:8.1f} {result['queries']:8.2f} {result['errors']:7d}")
+
+    report = {"config": config, "routes": results}
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w") as fh:
+            json.dump(report, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+
+    failed = any(r["errors"] for r in results.values())
+    if failed:
+        print("\nFAIL: some requests returned an error status")
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        if any(baseline.get("config", {}).get(k) != config[k] for k in ("backend", "latency_ms")):
+            print("note: baseline was recorded with a different backend or simulated latency")
+        if baseline.get("config", {}).get("machine") != config["machine"]:
+            print("note: baseline was recorded on a different machine; latencies may not be comparable")
+        regressed = compare(results, baseline, args.max_regression, args.min_delta_ms)
+        if regressed:
+            print(f"\nFAIL: regressed against baseline: {', '.join(regressed)}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# benchmarks/startup.py - cold-start benchmark for the serverless entry point
+#
+#   python benchmarks/startup.py                  # 5 fresh interpreters, GET /admin
+#   python benchmarks/startup.py --path / --runs 10 --max-import-ms 400
+#
+# Each run starts a new Python process (as a cold Vercel invocation does),
+# times `import app` and the first request through the Flask test client,
+# and checks that none of the deferred heavy modules were loaded eagerly.
+# Exits non-zero when a budget is exceeded, so it can gate CI.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load inside the routes that need them
+DEFERRED_MODULES = ["reportlab", "cloudinary", "flask_mail", "supabase", "httpx", "numpy"]
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+loaded = [m for m in %(deferred)r if m in sys.modules]
+client = app.app.test_client()
+status = client.get(%(path)r).status_code
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_response_ms": (t2 - t1) * 1000,
+                  "status": status, "eager_modules": loaded}))
+"""
+
+
+def run_once(path):
+    env = dict(os.environ)
+    # Placeholders are enough: nothing may connect during import
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:54321")
+    env.setdefault("SUPABASE_KEY", "benchmark")
+    env.setdefault("FLASK_SECRET_KEY", "benchmark")
+    out = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE % {"deferred": DEFERRED_MODULES, "path": path}],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for app.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/admin", help="route for the first request")
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-first-response-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    results = [run_once(args.path) for _ in range(args.runs)]
+    import_ms = [r["import_ms"] for r in results]
+    first_ms = [r["first_response_ms"] for r in results]
+    eager = sorted({m for r in results for m in r["eager_modules"]})
+
+    print(f"runs:               {args.runs}  (GET {args.path} -> {results[-1]['status']})")
+    print(f"import app:         median {statistics.median(import_ms):7.1f} ms   max {max(import_ms):7.1f} ms")
+    print(f"first response:     median {statistics.median(first_ms):7.1f} ms   max {max(first_ms):7.1f} ms")
+    print(f"eager heavy modules: {', '.join(eager) or 'none'}")
+
+    failed = False
+    if eager:
+        print("FAIL: deferred modules were imported at startup")
+        failed = True
+    if args.max_import_ms is not None and statistics.median(import_ms) > args.max_import_ms:
+        print(f"FAIL: import time above {args.max_import_ms} ms")
+        failed = True
+    if args.max_first_response_ms is not None and statistics.median(first_ms) > args.max_first_response_ms:
+        print(f"FAIL: first response above {args.max_first_response_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
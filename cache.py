@@ -0,0 +1,77 @@
+# cache.py - small in-process caches shared by the routes
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Thread-safe key/value store whose entries expire after `ttl` seconds.
+    Lives per worker process, so every instance warms its own copy. Expired
+    entries are swept out on every write, and with max_size the oldest
+    entries are dropped beyond that many keys.
+    """
+
+    def __init__(self, ttl=300, max_size=None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data = OrderedDict()  # key -> (value, expires_at), oldest write first
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by invalidate()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        # Every entry gets the same ttl, so write order is expiry order
+        now = time.monotonic()
+        self._data.pop(key, None)
+        self._data[key] = (value, now + self.ttl)
+        while self._data and next(iter(self._data.values()))[1] < now:
+            self._data.popitem(last=False)
+        while self.max_size and len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def get_or_set(self, key, loader):
+        """
+        Return the cached value for key, calling loader() to fill it on a miss.
+        Exceptions from loader() propagate and nothing is cached. If
+        invalidate() runs while loader() is working, the result is returned
+        but not stored, since it may predate the change.
+        """
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            with self._lock:
+                generation = self._generation
+            value = loader()
+            with self._lock:
+                if self._generation == generation:
+                    self._store(key, value)
+        return value
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
@@ -1,5 +1,6 @@
 import os
-from supabase import create_client, Client
+import threading
+
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,4 +8,82 @@ load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
\ No newline at end of file
+# Which store the supa_* helpers in app.py talk to: "supabase", or "sqlite"
+# to serve a single-node deployment from a local file (see backends.py)
+DATA_BACKEND = os.getenv("DATA_BACKEND", "supabase").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "data.sqlite3")
+
+# Connection pool / timeout tuning for the PostgREST HTTP client
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", 10))
+SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", 5))
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", 20))
+SUPABASE_KEEPALIVE_CONNECTIONS = int(os.getenv("SUPABASE_KEEPALIVE_CONNECTIONS", 10))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", 60))
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _http_client():
+    import httpx
+
+    return httpx.Client(
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+        http2=True,
+        follow_redirects=True,
+    )
+
+
+def get_client():
+    """
+    Return this process's Supabase client, building it on first use.
+    The client owns one keep-alive connection pool shared by every thread;
+    a forked worker notices the pid change and builds its own pool.
+    supabase itself is imported here, keeping it off the cold-start path.
+    """
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                from supabase import create_client, ClientOptions
+
+                _client = create_client(
+                    SUPABASE_URL,
+                    SUPABASE_KEY,
+                    options=ClientOptions(httpx_client=_http_client()),
+                )
+                _client_pid = pid
+    return _client
+
+
+class _LazyClient:
+    """Import-time stand-in for the client; the real one is built on first attribute access."""
+
+    def __getattr__(self, name):
+        return getattr(get_client(), name)
+
+
+supabase = _LazyClient()
+
+
+def make_backend(name=None):
+    name = name or DATA_BACKEND
+    if name == "sqlite":
+        from backends import SQLiteBackend
+
+        return SQLiteBackend(SQLITE_PATH)
+    if name == "supabase":
+        from backends import SupabaseBackend
+
+        return SupabaseBackend(supabase)
+    raise ValueError(f"Unknown DATA_BACKEND {name!r}; expected 'supabase' or 'sqlite'")
+
+
+backend = make_backend()
@@ -0,0 +1,101 @@
+# feeds.py - versioned change feed behind the device status push endpoints
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+
+class ChangeFeed:
+    """
+    Versioned key -> state map.
+    Writers publish() individual changes or load() a full snapshot (only the
+    keys that actually differ are recorded). Readers pass the cursor they last
+    saw to changes_since() and may block in wait() until something newer lands.
+
+    Versions are per process, so cursors carry a random epoch; a cursor from
+    another worker (or from before a restart) just gets the full snapshot.
+    """
+
+    def __init__(self, history=1000):
+        self.epoch = os.urandom(4).hex()
+        self.version = 0
+        self.updated_at = datetime.now(timezone.utc)
+        self._state = {}
+        self._log = deque(maxlen=history)  # (version, key)
+        self._cond = threading.Condition()
+
+    def cursor(self, version=None):
+        return f"{self.epoch}:{self.version if version is None else version}"
+
+    def _parse(self, cursor):
+        try:
+            epoch, version = (cursor or "").split(":", 1)
+            version = int(version)
+        except ValueError:
+            return None
+        if epoch != self.epoch or version > self.version:
+            return None
+        if version < self.version and (not self._log or self._log[0][0] > version + 1):
+            return None  # older than the retained history
+        return version
+
+    def _record(self, key, value):
+        if self._state.get(key, object()) == value:
+            return False
+        self._state[key] = value
+        self._bump(key)
+        return True
+
+    def _bump(self, key):
+        self.version += 1
+        self.updated_at = datetime.now(timezone.utc)
+        self._log.append((self.version, key))
+
+    def publish(self, key, value):
+        with self._cond:
+            if self._record(key, value):
+                self._cond.notify_all()
+            return self.version
+
+    def load(self, states):
+        """Replace the whole map with states, recording only the differences."""
+        with self._cond:
+            changed = False
+            for key in [k for k in self._state if k not in states]:
+                del self._state[key]
+                self._bump(key)
+                changed = True
+            for key, value in states.items():
+                changed = self._record(key, value) or changed
+            if changed:
+                self._cond.notify_all()
+            return self.version
+
+    def snapshot(self):
+        with self._cond:
+            return self.cursor(), dict(self._state)
+
+    def changes_since(self, cursor):
+        """
+        Return (new_cursor, changes, full). changes maps key -> state (None when the
+        key was removed); full is True when the cursor was unusable and changes
+        is the complete map.
+        """
+        with self._cond:
+            version = self._parse(cursor)
+            if version is None:
+                return self.cursor(), dict(self._state), True
+            keys = {key for v, key in self._log if v > version}
+            return self.cursor(), {k: self._state.get(k) for k in keys}, False
+
+    def wait(self, cursor, timeout):
+        """Block until the feed moves past cursor or timeout expires; True if it moved."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self.cursor() == cursor:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
@@ -0,0 +1,41 @@
+# fragments.py - {% cache %} tag for reusing rendered template blocks
+from jinja2 import nodes, Undefined
+from jinja2.ext import Extension
+
+
+class FragmentCacheExtension(Extension):
+    """
+    {% cache "name", version %} ... {% endcache %}
+
+    Renders the body once per (name, version) and hands back the stored HTML
+    until the version changes. The store is environment.fragment_cache
+    (anything with get/set, e.g. cache.TTLCache); with no store, or no
+    version, the body is simply rendered every time.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render_cached", args), [], [], body).set_lineno(lineno)
+
+    def _render_cached(self, name, version, caller):
+        store = self.environment.fragment_cache
+        if store is None or version is None or isinstance(version, Undefined):
+            return caller()
+        key = (name, version)
+        html = store.get(key)
+        if html is None:
+            html = caller()
+            store.set(key, html)
+        return html
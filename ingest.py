@@ -0,0 +1,159 @@
+# ingest.py - throttling, duplicate suppression and write-behind batching for public form submissions
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class TokenBucket:
+    """
+    Per-key token buckets: each key may spend `capacity` requests at once and
+    regains `rate` tokens per second. The least recently seen keys are
+    forgotten beyond max_keys, so a flood of addresses can't grow it unbounded.
+    """
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed
+
+
+class RecentKeys:
+    """Bounded set of keys seen in the last `ttl` seconds."""
+
+    def __init__(self, ttl, max_keys=10000):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._seen = OrderedDict()  # key -> seen_at, oldest first
+        self._lock = threading.Lock()
+
+    def seen(self, key):
+        """True if key was already recorded within ttl; records it either way."""
+        now = time.monotonic()
+        with self._lock:
+            while self._seen and next(iter(self._seen.values())) < now - self.ttl:
+                self._seen.popitem(last=False)
+            if key in self._seen:
+                return True
+            self._seen[key] = now
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+            return False
+
+    def forget(self, key):
+        with self._lock:
+            self._seen.pop(key, None)
+
+
+class WriteBehindBuffer:
+    """
+    Bounded queue of rows written by flush_fn(rows) in batches of up to
+    batch_size, from a background thread at most `interval` seconds after the
+    first row arrives (sooner once a full batch is waiting). add() returns
+    False when max_size rows are already waiting. When a batch insert fails
+    its rows are retried one at a time, so a single bad row can't hold up the
+    rest; rows still failing go back to the queue and are retried on the next
+    interval, and after max_attempts they are handed to on_failed(rows) and
+    dropped.
+    """
+
+    def __init__(self, flush_fn, max_size=1000, batch_size=50, interval=2.0, max_attempts=5, on_failed=None):
+        self.flush_fn = flush_fn
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.on_failed = on_failed
+        self._rows = deque()  # [row, failed attempts]
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+
+    def add(self, row):
+        with self._cond:
+            if len(self._rows) >= self.max_size:
+                return False
+            self._rows.append([row, 0])
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify()
+        self._ensure_worker()
+        return True
+
+    def pending(self):
+        with self._cond:
+            return len(self._rows)
+
+    def flush(self):
+        """Write everything waiting now; returns the number of rows written."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch = [self._rows.popleft() for _ in range(min(self.batch_size, len(self._rows)))]
+                if not batch:
+                    return written
+                try:
+                    self.flush_fn([row for row, _ in batch])
+                    written += len(batch)
+                    continue
+                except Exception as e:
+                    error = e
+                    print(f"Write-behind flush of {len(batch)} rows failed: {e}")
+
+                failed = batch
+                if len(batch) > 1:
+                    failed = []
+                    for entry in batch:
+                        try:
+                            self.flush_fn([entry[0]])
+                            written += 1
+                        except Exception as e:
+                            error = e
+                            failed.append(entry)
+                for entry in failed:
+                    entry[1] += 1
+                retry = [entry for entry in failed if entry[1] < self.max_attempts]
+                dead = [row for row, attempts in failed if attempts >= self.max_attempts]
+                with self._cond:
+                    self._rows.extendleft(reversed(retry))
+                if dead:
+                    print(f"Write-behind dropped {len(dead)} rows after {self.max_attempts} attempts: {error}")
+                    if self.on_failed:
+                        self.on_failed(dead)
+                if retry:
+                    return written  # try them again on the next interval
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        with self._cond:
+            if self._worker is None or not self._worker.is_alive() or self._worker_pid != pid:
+                self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._worker_pid = pid
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._rows:
+                    self._cond.wait()
+                if len(self._rows) < self.batch_size:
+                    self._cond.wait(self.interval)
+            self.flush()
+            if self.pending():
+                time.sleep(self.interval)  # back off after a failed flush
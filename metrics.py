@@ -0,0 +1,149 @@
+# metrics.py - per-request timings, Server-Timing data and Prometheus-style metrics
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                for bound, n in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_label_str(key + (('le', bound),))} {n}")
+                lines.append(f"{self.name}_bucket{_label_str(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_label_str(key)} {total}")
+                lines.append(f"{self.name}_count{_label_str(key)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(key)} {value}")
+        return lines
+
+
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Request latency by route.")
+REQUEST_QUERIES = Histogram("http_request_queries", "Supabase queries issued per request.", QUERY_COUNT_BUCKETS)
+DEPENDENCY_SECONDS = Histogram("dependency_call_duration_seconds", "Latency of Supabase, Cloudinary and mail calls.")
+DEPENDENCY_ERRORS = Counter("dependency_errors_total", "Failed Supabase, Cloudinary and mail calls.")
+ROWS = Counter("supabase_rows_total", "Rows returned or written by Supabase calls.")
+
+REGISTRY = [REQUEST_SECONDS, REQUEST_QUERIES, DEPENDENCY_SECONDS, DEPENDENCY_ERRORS, ROWS]
+
+
+class RequestTimings:
+    """Time spent per dependency kind during one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans = defaultdict(lambda: [0, 0.0])  # kind -> [calls, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, kind, seconds):
+        with self._lock:
+            span = self.spans[kind]
+            span[0] += 1
+            span[1] += seconds
+
+    def calls(self, kind):
+        return self.spans[kind][0] if kind in self.spans else 0
+
+    def server_timing(self):
+        """Value for the Server-Timing response header."""
+        parts = []
+        for kind, (calls, seconds) in sorted(self.spans.items()):
+            parts.append(f'{kind};dur={seconds * 1000:.1f};desc="{calls} calls"')
+        parts.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+def begin_request():
+    """Start collecting for the current request; returns a token for end_request()."""
+    return _current.set(RequestTimings())
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def timed(kind, op, target=""):
+    """Time one outbound call, feeding the histograms and the current request's totals."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DEPENDENCY_ERRORS.inc(kind=kind, op=op, target=target)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        DEPENDENCY_SECONDS.observe(elapsed, kind=kind, op=op, target=target)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(kind, elapsed)
+
+
+def record_rows(table, op, rows):
+    ROWS.inc(len(rows or []), table=table, op=op)
+
+
+def render_prometheus():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
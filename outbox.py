@@ -0,0 +1,135 @@
+# outbox.py - background delivery queue for outgoing mail
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+
+import metrics
+
+
+class OutboxJob:
+    def __init__(self, message, meta=None):
+        self.message = message
+        self.meta = meta or {}
+        self.attempts = 0
+        self.last_error = None
+
+
+class Outbox:
+    """
+    Queue of messages delivered by one worker thread.
+
+    connect() must return a context manager whose value has send(message)
+    (Flask-Mail's mail.connect()). The connection stays open while there is
+    work and is closed after idle_timeout seconds without any, so a burst of
+    replies pays the SMTP/TLS handshake once. A failed send drops the
+    connection and the message is retried with exponential backoff; on_sent
+    or on_failed is called with the job once its fate is known. context, when
+    given, wraps the worker's whole lifetime (e.g. app.app_context).
+    """
+
+    def __init__(self, connect, on_sent=None, on_failed=None, context=None,
+                 max_attempts=5, backoff=2.0, max_backoff=300.0, idle_timeout=30.0):
+        self.connect = connect
+        self.on_sent = on_sent
+        self.on_failed = on_failed
+        self.context = context
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.idle_timeout = idle_timeout
+        self._heap = []  # (due, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._worker = None
+        self._worker_pid = None
+
+    def put(self, message, **meta):
+        job = OutboxJob(message, meta)
+        self._schedule(job, time.monotonic())
+        self._ensure_worker()
+        return job
+
+    def pending(self):
+        with self._cond:
+            return len(self._heap)
+
+    def _schedule(self, job, due):
+        with self._cond:
+            heapq.heappush(self._heap, (due, next(self._seq), job))
+            self._cond.notify()
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        with self._cond:
+            if self._worker is None or not self._worker.is_alive() or self._worker_pid != pid:
+                self._worker = threading.Thread(target=self._run, name="mail-outbox", daemon=True)
+                self._worker_pid = pid
+                self._worker.start()
+
+    def _next_job(self, connected):
+        """Block until a job is due; None when the connection has idled out."""
+        idle_deadline = time.monotonic() + self.idle_timeout
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)[2]
+                if connected and now >= idle_deadline:
+                    return None
+                waits = [self._heap[0][0] - now] if self._heap else []
+                if connected:
+                    waits.append(idle_deadline - now)
+                self._cond.wait(min(waits) if waits else None)
+
+    def _run(self):
+        with (self.context() if self.context else nullcontext()):
+            conn = None
+            stack = ExitStack()
+            while True:
+                job = self._next_job(conn is not None)
+                if job is None:
+                    self._close_quietly(stack)
+                    conn = None
+                    continue
+                try:
+                    if conn is None:
+                        with metrics.timed("mail", "connect"):
+                            conn = stack.enter_context(self.connect())
+                    with metrics.timed("mail", "send"):
+                        conn.send(job.message)
+                except Exception as e:
+                    self._close_quietly(stack)
+                    conn = None
+                    self._failed(job, e)
+                    continue
+                self._callback(self.on_sent, job)
+
+    def _failed(self, job, error):
+        job.attempts += 1
+        job.last_error = error
+        if job.attempts < self.max_attempts:
+            delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1))
+            print(f"Mail delivery failed (attempt {job.attempts}), retrying in {delay:.0f}s: {error}")
+            self._schedule(job, time.monotonic() + delay)
+        else:
+            print(f"Mail delivery gave up after {job.attempts} attempts: {error}")
+            self._callback(self.on_failed, job)
+
+    @staticmethod
+    def _close_quietly(stack):
+        try:
+            stack.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _callback(fn, job):
+        if fn is None:
+            return
+        try:
+            fn(job)
+        except Exception as e:
+            print(f"Outbox callback failed: {e}")
@@ -0,0 +1,91 @@
+# reports.py - PDF reports built with reportlab's platypus layout engine
+from collections import defaultdict
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+HEADER_STYLE = [
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1a1a2e")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("ALIGN", (-1, 0), (-1, -1), "RIGHT"),
+    ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#cccccc")),
+    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f4f4f8")]),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+]
+
+LEDGER_BLOCK_ROWS = 40
+
+
+def _money(amount):
+    # Helvetica has no rupee glyph, so spell the currency out
+    return f"Rs. {amount:,.2f}"
+
+
+def _page_number(canvas, doc):
+    canvas.saveState()
+    canvas.setFont("Helvetica", 8)
+    canvas.drawRightString(A4[0] - 15 * mm, 10 * mm, f"Page {doc.page}")
+    canvas.restoreState()
+
+
+def build_expense_report(expenses, title="Expense Report"):
+    """
+    Render expenses as a paginated table followed by per-category subtotals
+    and a grand total. Returns the PDF as bytes.
+    """
+    styles = getSampleStyleSheet()
+    total = 0.0
+    by_category = defaultdict(float)
+
+    rows = [["Date", "Title", "Category", "Amount"]]
+    for e in expenses:
+        amount = float(e.get("amount") or 0)
+        total += amount
+        by_category[e.get("category") or "Uncategorised"] += amount
+        rows.append([e.get("date") or "", e.get("title") or "", e.get("category") or "", _money(amount)])
+
+    # One Table per page-sized block: platypus re-measures a table every time it
+    # splits one across pages, which gets slow for multi-thousand-row ledgers.
+    col_widths = [28 * mm, 80 * mm, 40 * mm, 32 * mm]
+    ledger = []
+    for start in range(1, max(len(rows), 2), LEDGER_BLOCK_ROWS):
+        block = Table([rows[0]] + rows[start:start + LEDGER_BLOCK_ROWS], colWidths=col_widths, repeatRows=1)
+        block.setStyle(TableStyle(HEADER_STYLE))
+        ledger.append(block)
+
+    summary_rows = [["Category", "Entries", "Amount"]]
+    counts = defaultdict(int)
+    for e in expenses:
+        counts[e.get("category") or "Uncategorised"] += 1
+    for category, amount in sorted(by_category.items(), key=lambda kv: kv[1], reverse=True):
+        summary_rows.append([category, str(counts[category]), _money(amount)])
+    summary_rows.append(["Total", str(len(expenses)), _money(total)])
+    summary = Table(summary_rows, colWidths=[80 * mm, 30 * mm, 40 * mm], repeatRows=1)
+    summary.setStyle(TableStyle(HEADER_STYLE + [
+        ("FONTNAME", (0, -1), (-1, -1), "Helvetica-Bold"),
+        ("LINEABOVE", (0, -1), (-1, -1), 1, colors.black),
+    ]))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=15 * mm, rightMargin=15 * mm, topMargin=15 * mm, bottomMargin=18 * mm,
+    )
+    story = [
+        Paragraph(title, styles["Title"]),
+        Paragraph(f"{len(expenses)} expenses, total {_money(total)}", styles["Normal"]),
+        Spacer(1, 6 * mm),
+        Paragraph("By category", styles["Heading2"]),
+        summary,
+        Spacer(1, 8 * mm),
+        Paragraph("All expenses", styles["Heading2"]),
+        *ledger,
+    ]
+    doc.build(story, onFirstPage=_page_number, onLaterPages=_page_number)
+    return buffer.getvalue()
@@ -0,0 +1,3 @@
+-- Login looks admins up by username; the unique index makes that an index
+-- probe instead of a scan and keeps two accounts from sharing a name.
+create unique index if not exists admin_username_idx on admin (username);
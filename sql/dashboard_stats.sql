@@ -0,0 +1,19 @@
+-- dashboard_stats(): every admin counter in one round trip.
+-- Run once in the Supabase SQL editor.
+create or replace function dashboard_stats()
+returns json
+language sql
+stable
+as $$
+  select json_build_object(
+    'not_seen',    (select count(*) from contact where seen = false),
+    'not_replied', (select count(*) from contact where replied = false),
+    'contacts',    (select count(*) from contact),
+    'projects',    (select count(*) from projects where status = 1)
+  );
+$$;
+
+-- Partial indexes keep the unseen/unreplied counts cheap as the inbox grows.
+create index if not exists contact_not_seen_idx on contact (id) where seen = false;
+create index if not exists contact_not_replied_idx on contact (id) where replied = false;
+create index if not exists projects_active_idx on projects (id) where status = 1;
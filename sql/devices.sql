@@ -0,0 +1,12 @@
+-- toggle_device(): flip one device in a single atomic statement.
+-- Concurrent toggles serialize on the row lock instead of overwriting
+-- each other, and the caller gets the new state back in the same round trip.
+create or replace function toggle_device(device_id bigint)
+returns table (id bigint, status int)
+language sql
+as $$
+  update devices d
+     set status = case when d.status = 0 then 1 else 0 end
+   where d.id = device_id
+  returning d.id, d.status;
+$$;
@@ -0,0 +1,71 @@
+-- expense_summary(): one user's total, row count and category / month
+-- rollups, aggregated in Postgres so the app never pulls the whole ledger
+-- just to add it up. `version` changes whenever a row is added, edited or
+-- removed; the app keys its report and analytics caches on it.
+-- Run once in the Supabase SQL editor.
+
+-- Per-user write counter behind `version`, kept by a trigger so reading it
+-- never scans the ledger.
+create table if not exists expense_version (
+  user_id bigint primary key,
+  version bigint not null default 0
+);
+
+create or replace function bump_expense_version()
+returns trigger
+language plpgsql
+security definer
+as $$
+begin
+  if tg_op in ('UPDATE', 'DELETE') and old.user_id is not null then
+    insert into expense_version (user_id, version) values (old.user_id, 1)
+      on conflict (user_id) do update set version = expense_version.version + 1;
+  end if;
+  if tg_op in ('INSERT', 'UPDATE') and new.user_id is not null then
+    insert into expense_version (user_id, version) values (new.user_id, 1)
+      on conflict (user_id) do update set version = expense_version.version + 1;
+  end if;
+  return null;
+end;
+$$;
+
+drop trigger if exists expense_version_bump on expense;
+create trigger expense_version_bump
+  after insert or update or delete on expense
+  for each row execute function bump_expense_version();
+
+create or replace function expense_summary(p_user_id bigint)
+returns json
+language sql
+stable
+as $$
+  -- One pass over the user's rows (the CTE is materialized once)
+  with ledger as (
+    select amount,
+           coalesce(category, 'Other') as category,
+           coalesce(to_char(date, 'YYYY-MM'), 'unknown') as month
+      from expense
+     where user_id = p_user_id
+  ), totals as (
+    select coalesce(sum(amount), 0) as total, count(*) as n from ledger
+  )
+  select json_build_object(
+    'total', totals.total,
+    'count', totals.n,
+    'by_category', coalesce((
+      select json_object_agg(category, total)
+        from (select category, sum(amount) as total from ledger group by 1) c
+    ), '{}'::json),
+    'by_month', coalesce((
+      select json_object_agg(month, total)
+        from (select month, sum(amount) as total from ledger group by 1) m
+    ), '{}'::json),
+    'version', totals.n || '-' || coalesce(
+      (select version from expense_version where user_id = p_user_id), 0
+    )
+  )
+  from totals;
+$$;
+
+-- Every expense query filters on user_id; the date column backs the ordering.
+create index if not exists expense_user_date_idx on expense (user_id, date desc);
@@ -0,0 +1,97 @@
+-- Schema for the embedded SQLite backend (DATA_BACKEND=sqlite).
+-- Applied on every new connection, so every statement is idempotent.
+-- Mirrors the Supabase tables the app uses. BOOLEAN columns come back as
+-- Python bools, and dates are ISO text.
+
+create table if not exists home (
+  id integer primary key,
+  name text, title text, role text, about text, phone text,
+  insta text, github text, linkedin text, main text,
+  firstimage text, secondimage text
+);
+
+create table if not exists admin (
+  id integer primary key,
+  username text not null,
+  password text not null
+);
+create unique index if not exists admin_username_idx on admin (username);
+
+create table if not exists projects (
+  id integer primary key,
+  title text, description text, "desc" text, image text,
+  link text, github text, tech_stack text,
+  status integer not null default 1
+);
+create index if not exists projects_status_idx on projects (status, id);
+
+create table if not exists categories (
+  id integer primary key,
+  name text
+);
+
+create table if not exists skills (
+  id integer primary key,
+  name text,
+  category_id integer references categories (id)
+);
+create index if not exists skills_category_idx on skills (category_id);
+
+create table if not exists contact (
+  id integer primary key,
+  name text, email text, message text,
+  seen boolean not null default 0,
+  replied boolean not null default 0
+);
+create index if not exists contact_seen_idx on contact (seen);
+create index if not exists contact_replied_idx on contact (replied, id);
+
+create table if not exists devices (
+  id integer primary key,
+  name text,
+  status integer not null default 0
+);
+
+create table if not exists students (
+  id integer primary key,
+  name text, roll_no text, dpt text, email text, ph_no text, dob text,
+  address text, f_name text, f_phno text, m_name text, m_phno text,
+  aadhaar_no text, image text
+);
+create index if not exists students_name_idx on students (name collate nocase);
+create index if not exists students_roll_no_idx on students (roll_no collate nocase);
+create index if not exists students_dpt_idx on students (dpt);
+
+create table if not exists expense (
+  id integer primary key,
+  title text,
+  amount real not null default 0,
+  category text,
+  date text,
+  notes text,
+  user_id integer
+);
+create index if not exists expense_user_date_idx on expense (user_id, date desc, id desc);
+create index if not exists expense_user_id_idx on expense (user_id, id);
+
+-- Per-user write counter behind expense_summary()'s `version`, kept by
+-- triggers so reading it never scans the ledger.
+create table if not exists expense_version (
+  user_id integer primary key,
+  version integer not null default 0
+);
+create trigger if not exists expense_version_insert after insert on expense
+when new.user_id is not null begin
+  insert into expense_version (user_id, version) values (new.user_id, 1)
+    on conflict (user_id) do update set version = version + 1;
+end;
+create trigger if not exists expense_version_update after update on expense begin
+  insert into expense_version (user_id, version)
+    select user_id, 1 from (select old.user_id as user_id union all select new.user_id) where user_id is not null
+    on conflict (user_id) do update set version = version + 1;
+end;
+create trigger if not exists expense_version_delete after delete on expense
+when old.user_id is not null begin
+  insert into expense_version (user_id, version) values (old.user_id, 1)
+    on conflict (user_id) do update set version = version + 1;
+end;
@@ -0,0 +1,13 @@
+-- Trigram indexes behind the /students search box.
+-- The search is name/roll_no/dpt/email ILIKE '%term%' OR'd together;
+-- each arm can use its GIN index, so it stays an index scan as the roster grows.
+create extension if not exists pg_trgm;
+
+create index if not exists students_name_trgm_idx on students using gin (name gin_trgm_ops);
+create index if not exists students_roll_no_trgm_idx on students using gin (roll_no gin_trgm_ops);
+create index if not exists students_dpt_trgm_idx on students using gin (dpt gin_trgm_ops);
+create index if not exists students_email_trgm_idx on students using gin (email gin_trgm_ops);
+
+-- Sort + keyset pagination orders used by the listing
+create index if not exists students_name_id_idx on students (name, id);
+create index if not exists students_roll_no_id_idx on students (roll_no, id);
@@ -0,0 +1,58 @@
+// Direct browser-to-Cloudinary uploads for the admin forms.
+// A form opts in with data-upload-folder="<folder>"; each file input is sent
+// to Cloudinary with a signature from /uploads/sign, and only the resulting
+// public id/version/signature go back to Flask in hidden fields.
+(function () {
+  function setHidden(form, name, value) {
+    let input = form.querySelector(`input[type="hidden"][name="${name}"]`);
+    if (!input) {
+      input = document.createElement('input');
+      input.type = 'hidden';
+      input.name = name;
+      form.appendChild(input);
+    }
+    input.value = value;
+  }
+
+  async function uploadFile(form, input) {
+    const file = input.files[0];
+    if (!file) return;
+
+    const signBody = new FormData();
+    signBody.append('folder', form.dataset.uploadFolder);
+    const signRes = await fetch('/uploads/sign', { method: 'POST', body: signBody });
+    if (!signRes.ok) throw new Error('Could not sign upload');
+    const params = await signRes.json();
+
+    const uploadBody = new FormData();
+    uploadBody.append('file', file);
+    ['api_key', 'timestamp', 'signature', 'folder'].forEach(k => uploadBody.append(k, params[k]));
+    const uploadRes = await fetch(params.upload_url, { method: 'POST', body: uploadBody });
+    if (!uploadRes.ok) throw new Error('Cloudinary upload failed');
+    const result = await uploadRes.json();
+
+    setHidden(form, `${input.name}_public_id`, result.public_id);
+    setHidden(form, `${input.name}_version`, result.version);
+    setHidden(form, `${input.name}_signature`, result.signature);
+    // The bytes are already on Cloudinary; don't post them to Flask as well
+    input.value = '';
+  }
+
+  document.querySelectorAll('form[data-upload-folder]').forEach(form => {
+    const pending = new Set();
+    const submit = form.querySelector('[type="submit"]');
+
+    form.querySelectorAll('input[type="file"]').forEach(input => {
+      input.addEventListener('change', () => {
+        const job = uploadFile(form, input)
+          .catch(err => console.error(err))  // fall back to a normal form upload
+          .finally(() => {
+            pending.delete(job);
+            if (submit && pending.size === 0) submit.disabled = false;
+          });
+        pending.add(job);
+        if (submit) submit.disabled = true;
+      });
+    });
+  });
+})();